@@ -1,56 +1,152 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
 from typing import List
-from app.models.movie import Movie, QueryRequest, KeywordSearchRequest
-from app.services.search import semantic_search, keyword_search, get_movie_by_id, hybrid_search
+from app.models.movie import Movie, QueryRequest, KeywordSearchRequest, BatchSearchRequest, BatchSearchResponse, Facets, SuggestResponse
+from app.services.search import (
+    semantic_search, keyword_search, get_movie_by_id, hybrid_search, batch_search,
+    paged_search, InvalidCursorError, faceted_search, get_global_facets, get_similar_movies
+)
+import json
+from app.services.suggest import suggest
+from app.core.config import settings
+from app.core.telemetry import traced_json_response
+from app.core.serialization import FastJSONResponse
 
 router = APIRouter()
 
+def _with_next_cursor(response, next_cursor):
+    """Attach the cursor of the next page, if there is one"""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def _with_facets(response, facets):
+    """Attach the facet counts of the search as JSON"""
+    response.headers["X-Facets"] = json.dumps(facets, separators=(",", ":"))
+    return response
+
+def _check_facets(req) -> None:
+    if req.facets and (req.paginate or req.cursor):
+        raise HTTPException(status_code=400, detail="Facets are not supported with cursor pagination")
+
 @router.post("/hybrid-search", response_model=List[Movie])
-async def search_movies_hybrid(req: QueryRequest):
+async def search_movies_hybrid(req: QueryRequest, debug: bool = Query(False, description="Return ES took time and candidate counts in X-Search-Debug")):
     """
     Search for movies using hybrid approach combining BM25 and vector similarity.
     Provides better results by leveraging both keyword matching and semantic understanding.
+    `fields` limits each result to the listed Movie fields.
+    Set `paginate` (or pass the previous `cursor`) for cursor pagination; the
+    next page's cursor is returned in the X-Next-Cursor header.
+    Set `facets` for genre, decade and rating counts of all matches, computed
+    in the same Elasticsearch request and returned in the X-Facets header.
+    Stage durations are returned in the Server-Timing header.
     """
+    _check_facets(req)
     try:
         # Default weight is 50-50 but can be customized
         weights = getattr(req, "weights", {}) or {}  # Handle None case
         bm25_weight = weights.get("bm25", 0.5)
         vector_weight = weights.get("vector", 0.5)
         
+        if req.facets:
+            results, facets = faceted_search(
+                "hybrid",
+                req.query,
+                size=req.size or 10,
+                filters=req.filters,
+                weights=weights,
+                fields=req.fields
+            )
+            return _with_facets(traced_json_response(results, "hybrid", debug, req.fields), facets)
+        
+        if req.paginate or req.cursor:
+            results, next_cursor = paged_search(
+                "hybrid",
+                req.query,
+                size=req.size or 10,
+                cursor=req.cursor,
+                filters=req.filters,
+                weights=weights,
+                fields=req.fields
+            )
+            return _with_next_cursor(traced_json_response(results, "hybrid", debug, req.fields), next_cursor)
+        
         results = hybrid_search(
             query=req.query,
             size=req.size if hasattr(req, "size") else 10,
             bm25_multiplier=bm25_weight,
             vector_multiplier=vector_weight,
-            filters=req.filters if hasattr(req, "filters") else None
+            filters=req.filters if hasattr(req, "filters") else None,
+            fields=req.fields
         )
-        return results
+        return traced_json_response(results, "hybrid", debug, req.fields)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Hybrid search failed: {str(e)}")
     
 @router.post("/semantic-search", response_model=List[Movie])
-async def search_movies_semantic(req: QueryRequest):
+async def search_movies_semantic(req: QueryRequest, debug: bool = Query(False, description="Return ES took time and candidate counts in X-Search-Debug")):
     """
     Search for movies using semantic similarity with the query.
     Supports filtering and advanced query options.
+    `fields` limits each result to the listed Movie fields.
+    Set `paginate` (or pass the previous `cursor`) for cursor pagination; the
+    next page's cursor is returned in the X-Next-Cursor header.
+    Set `facets` for genre, decade and rating counts of all matches, computed
+    in the same Elasticsearch request and returned in the X-Facets header.
+    Stage durations are returned in the Server-Timing header.
     """
+    _check_facets(req)
     try:
+        if req.facets:
+            results, facets = faceted_search(
+                "semantic",
+                req.query,
+                size=req.size or 10,
+                min_score=req.min_score,
+                filters=req.filters,
+                fields=req.fields
+            )
+            return _with_facets(traced_json_response(results, "semantic", debug, req.fields), facets)
+        
+        if req.paginate or req.cursor:
+            results, next_cursor = paged_search(
+                "semantic",
+                req.query,
+                size=req.size or 10,
+                cursor=req.cursor,
+                min_score=req.min_score,
+                filters=req.filters,
+                fields=req.fields
+            )
+            return _with_next_cursor(traced_json_response(results, "semantic", debug, req.fields), next_cursor)
+        
         results = semantic_search(
             query=req.query,
             size=req.size,
             min_score=req.min_score,
-            filters=req.filters
+            filters=req.filters,
+            fields=req.fields
         )
-        return results
+        return traced_json_response(results, "semantic", debug, req.fields)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @router.post("/keyword-search", response_model=List[Movie])
-async def search_movies_keyword(req: KeywordSearchRequest):
+async def search_movies_keyword(req: KeywordSearchRequest, debug: bool = Query(False, description="Return ES took time and candidate counts in X-Search-Debug")):
     """
     Search for movies using keyword matching in title, overview, and other fields.
     Supports basic filtering options via query parameters.
+    `fields` limits each result to the listed Movie fields.
+    Set `paginate` (or pass the previous `cursor`) for cursor pagination; the
+    next page's cursor is returned in the X-Next-Cursor header.
+    Set `facets` for genre, decade and rating counts of all matches, computed
+    in the same Elasticsearch request and returned in the X-Facets header.
+    Stage durations are returned in the Server-Timing header.
     """
+    _check_facets(req)
     try:
         # Build filters dict from query parameters
         filters = {}
@@ -67,16 +163,97 @@ async def search_movies_keyword(req: KeywordSearchRequest):
         if req.genres is not None:
             genres_list = [genre.strip() for genre in req.genres.split(',')]
             filters["genres"] = genres_list
-            
+        
+        if req.facets:
+            results, facets = faceted_search(
+                "keyword",
+                req.query,
+                size=req.size,
+                filters=filters if filters else None,
+                fields=req.fields
+            )
+            return _with_facets(traced_json_response(results, "keyword", debug, req.fields), facets)
+        
+        if req.paginate or req.cursor:
+            results, next_cursor = paged_search(
+                "keyword",
+                req.query,
+                size=req.size,
+                cursor=req.cursor,
+                filters=filters if filters else None,
+                fields=req.fields
+            )
+            return _with_next_cursor(traced_json_response(results, "keyword", debug, req.fields), next_cursor)
+        
         results = keyword_search(
             query=req.query,
             size=req.size,
-            filters=filters if filters else None
+            filters=filters if filters else None,
+            fields=req.fields
         )
-        return results
+        return traced_json_response(results, "keyword", debug, req.fields)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@router.post("/batch-search", response_model=BatchSearchResponse)
+async def search_movies_batch(req: BatchSearchRequest, debug: bool = Query(False, description="Return ES took time and candidate counts in X-Search-Debug")):
+    """
+    Run many searches in one call, each with its own mode, filters, weights
+    and fields. Query texts are encoded in one batch and all searches are
+    sent to Elasticsearch as a single _msearch.
+    Results are returned in request order; a failed search carries an error
+    instead of failing the whole batch. A search with `facets` also returns
+    its facet counts.
+    """
+    if len(req.queries) > settings.BATCH_SEARCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_SEARCH_MAX_QUERIES} queries per batch"
+        )
+    if any(query.paginate or query.cursor for query in req.queries):
+        raise HTTPException(status_code=400, detail="Pagination is not supported in batch searches")
+    
+    try:
+        results = batch_search([query.model_dump() for query in req.queries])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+    
+    # Apply each search's own projection
+    for query, result in zip(req.queries, results):
+        if query.fields:
+            result["results"] = [movie.model_dump(include=set(query.fields)) for movie in result["results"]]
+    
+    return traced_json_response({"results": results}, "batch", debug)
+
+@router.get("/facets", response_model=Facets)
+async def get_catalog_facets():
+    """
+    Genre, decade and rating counts of the whole catalog.
+    Cached by the server and refreshed after a reindex.
+    """
+    try:
+        return FastJSONResponse(get_global_facets())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Facets failed: {str(e)}")
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest_movies(
+    q: str = Query(..., min_length=1, max_length=50, description="Text typed so far"),
+    size: int = Query(5, ge=1, le=20),
+    fuzzy: bool = Query(True, description="Also match prefixes one typo away")
+):
+    """
+    Typeahead suggestions: titles (including original titles) and director
+    or cast names starting with the typed text, or with one typo in it.
+    Any word of a title or name can be the start, e.g. "nolan".
+    """
+    try:
+        return traced_json_response(suggest(q, size=size, fuzzy=fuzzy), "suggest")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Suggest failed: {str(e)}")
+
 @router.get("/{movie_id}", response_model=Movie)
 async def get_movie(movie_id: str):
     """
@@ -85,4 +262,20 @@ async def get_movie(movie_id: str):
     movie = get_movie_by_id(movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail=f"Movie with ID {movie_id} not found")
-    return movie
\ No newline at end of file
+    return FastJSONResponse(movie)
+
+@router.get("/{movie_id}/similar", response_model=List[Movie])
+async def get_similar(movie_id: str, size: int = Query(10, ge=1, le=settings.SIMILAR_TOP_K)):
+    """
+    Movies most similar to the given one ("more like this"), from
+    neighbour lists precomputed by scripts/index_data.py.
+    Scores are the 0-1 cosine similarity of the embeddings.
+    Only SIMILAR_TOP_K neighbours are stored per movie, so size is capped there.
+    """
+    try:
+        results = get_similar_movies(movie_id, size=size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Similar movies failed: {str(e)}")
+    if results is None:
+        raise HTTPException(status_code=404, detail=f"Movie with ID {movie_id} not found")
+    return traced_json_response(results, "similar")
@@ -1,27 +1,59 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from app.models.summary import MovieSummaryRequest, MovieSummaryResponse
-from app.services.summary import create_movie_summary
+from app.services.summary import submit_movie_summary, SummaryOverloadedError
+from app.services.search import get_documents_by_ids
+from app.core.telemetry import SUMMARIES, stage, traced_json_response
 
 router = APIRouter()
 
 @router.post("/summarize", response_model=MovieSummaryResponse)
-async def summarize_movies(request: MovieSummaryRequest = Body(...)):
+async def summarize_movies(
+    request: MovieSummaryRequest = Body(...),
+    debug: bool = Query(False, description="Return trace details in X-Search-Debug")
+):
     """
     Generate a summary of the provided movies
     
-    The frontend should send a list of movies and an optional query
+    The frontend should send either a list of movies or a list of movie IDs
+    (hydrated server-side from the document cache) and an optional query.
+    Returns 429/503 with a Retry-After header when the summary queue is saturated.
+    With `max_latency_ms` set, an extractive fallback summary is returned instead
+    whenever the LLM cannot answer within the budget; `source` reports the path.
+    Stage durations (fetch, queue, prompt, generate, serialize) are returned in the
+    Server-Timing header.
     """
-    # Extract movie data from request
-    movies = [movie.dict() for movie in request.movies]
+    # Extract movie data from request, fetching documents when only IDs are sent
+    if request.movie_ids:
+        try:
+            with stage("fetch", "summary"):
+                movies = await run_in_threadpool(get_documents_by_ids, request.movie_ids)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Fetching movies failed: {str(e)}")
+    else:
+        movies = [movie.dict() for movie in request.movies]
     query = request.query
     
-    # Generate summary using the LLM
-    summary = create_movie_summary(movies, query)
+    # Generate summary using the LLM on the bounded worker pool
+    try:
+        summary, source = await submit_movie_summary(movies, query, request.max_latency_ms)
+    except SummaryOverloadedError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    SUMMARIES.inc(source)
     
     # Return the summary along with metadata
-    return MovieSummaryResponse(
-        summary=summary,
-        query=query,
-        movie_count=len(movies)
+    return traced_json_response(
+        MovieSummaryResponse(
+            summary=summary,
+            query=query,
+            movie_count=len(movies),
+            source=source
+        ),
+        "summary",
+        debug
     )
\ No newline at end of file
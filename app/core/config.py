@@ -9,10 +9,79 @@ class Settings(BaseSettings):
     ELASTICSEARCH_API_KEY: str
     INDEX_NAME: str
     
+    # Record/replay of Elasticsearch traffic ("", "record" or "replay")
+    ES_FIXTURE_MODE: str = ""
+    ES_FIXTURE_PATH: str = "evaluation_results/es_fixture.jsonl.gz"
+    
     # Vector model configuration
     VECTOR_MODEL_NAME: str
     VECTOR_DIMENSIONS: int
     
+    # Query embedding backend: "torch" or "onnx" (exported graph, see scripts/build_model_artifacts.py)
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_PARITY_THRESHOLD: float = 0.99
+    
+    # Pre-serialized model artifacts (see scripts/build_model_artifacts.py)
+    MODEL_ARTIFACTS_DIR: str = "/app/model_artifacts"
+    
+    # Document cache used for id lookups; entries expire so reindexed documents are picked up
+    DOCUMENT_CACHE_SIZE: int = 10000
+    DOCUMENT_CACHE_TTL_SECONDS: int = 300
+    
+    # Summary prompt configuration
+    SUMMARY_PROMPT_TOKEN_BUDGET: int = 768
+    SUMMARY_MAX_MOVIES: int = 10
+    SUMMARY_CAST_NAMES: int = 5
+    SUMMARY_FRAGMENT_CACHE_SIZE: int = 4096
+    
+    # Summary admission control
+    SUMMARY_WORKERS: int = 1
+    SUMMARY_QUEUE_DEPTH: int = 4
+    SUMMARY_MAX_WAIT_SECONDS: float = 30.0
+    SUMMARY_INITIAL_ESTIMATE_SECONDS: float = 5.0
+    
+    # Memory governor thresholds
+    MEMORY_RSS_HIGH_WATER_MB: int = 3072
+    MEMORY_VRAM_HIGH_WATER_FRACTION: float = 0.9
+    MEMORY_RECLAIM_COOLDOWN_SECONDS: float = 30.0
+    
+    # Cursor pagination: point-in-time keep-alive / hybrid page cache lifetime
+    SEARCH_CURSOR_TTL_SECONDS: int = 300
+    HYBRID_CURSOR_CANDIDATES: int = 300
+    HYBRID_CURSOR_CACHE_SIZE: int = 256
+    
+    # Facets: genre buckets returned, and how often the cached global facets
+    # check the index for a reindex (see mark_indexed in app/db/index.py)
+    FACET_GENRE_SIZE: int = 50
+    FACETS_CACHE_TTL_SECONDS: int = 60
+    
+    # Typeahead: cast names entered per movie, and the prefix response cache
+    SUGGEST_CAST_NAMES: int = 10
+    SUGGEST_CACHE_SIZE: int = 4096
+    SUGGEST_CACHE_TTL_SECONDS: int = 60
+    
+    # Precomputed "similar movies": neighbours kept per movie, rows per matmul block
+    SIMILAR_TOP_K: int = 20
+    SIMILAR_BLOCK_SIZE: int = 512
+    
+    # Maximum number of searches in one /batch-search request
+    BATCH_SEARCH_MAX_QUERIES: int = 100
+    
+    # Response compression for clients sending Accept-Encoding: gzip
+    GZIP_MINIMUM_SIZE: int = 1024
+    GZIP_COMPRESS_LEVEL: int = 5
+    
+    # Request profiling (see app/core/profiling.py); off unless a rate or token is set.
+    # A profile covers the whole event loop thread while the request runs, so it
+    # also contains any concurrent requests; profile under low load.
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_HEADER: str = "X-Profile"
+    PROFILE_HEADER_TOKEN: str = ""
+    PROFILE_MODE: str = "sample"  # "sample" (collapsed stacks) or "cprofile" (pstats)
+    PROFILE_SAMPLE_INTERVAL_MS: float = 2.0
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 500
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -20,4 +89,4 @@ class Settings(BaseSettings):
         env_prefix = ""
         extra = "ignore"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
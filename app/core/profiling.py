@@ -0,0 +1,196 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import logging
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+
+# Only one request is profiled at a time, which bounds the overhead. It does
+# not isolate that request: other requests interleaved on the event loop
+# while it runs are recorded in its profile too.
+_profile_lock = threading.Lock()
+
+class StackSampler:
+    """Sample the call stack of one thread at a fixed interval"""
+    
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+    
+    def start(self) -> None:
+        self._thread.start()
+    
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+    
+    def collapsed(self) -> str:
+        """Samples in the collapsed-stack format read by flamegraph.pl and speedscope"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+def _slug(text: str, limit: int = 40) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").lower()
+    return slug[:limit] or "root"
+
+def _extract_query(scope, body: bytes) -> str:
+    """The search query of a request, from the JSON body or the query string"""
+    try:
+        payload = json.loads(body) if body else {}
+        if isinstance(payload, dict) and isinstance(payload.get("query"), str):
+            return payload["query"]
+    except ValueError:
+        pass
+    
+    params = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return params.get("query", [""])[0]
+
+def _prune_profiles(directory: str, max_files: int) -> None:
+    """Delete the oldest profiles beyond max_files"""
+    files = [
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith((".pstats", ".collapsed"))
+    ]
+    if len(files) <= max_files:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - max_files]:
+        os.remove(path)
+
+def write_profile(profiler, record: Dict[str, Any], directory: Optional[str] = None) -> str:
+    """
+    Write a finished profile and append its metadata to the index
+    
+    Args:
+        profiler: A cProfile.Profile or StackSampler
+        record: Request metadata (endpoint, query, status, duration)
+        directory: Output directory (default: PROFILE_DIR)
+    
+    Returns:
+        Path of the written profile
+    """
+    directory = directory or settings.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    name = f"{timestamp}_{_slug(record['endpoint'])}_{_slug(record['query'])}"
+    
+    if isinstance(profiler, StackSampler):
+        path = os.path.join(directory, name + ".collapsed")
+        with open(path, "w") as f:
+            f.write(profiler.collapsed())
+    else:
+        path = os.path.join(directory, name + ".pstats")
+        profiler.dump_stats(path)
+    
+    with open(os.path.join(directory, INDEX_FILE), "a") as f:
+        f.write(json.dumps(dict(record, file=os.path.basename(path), timestamp=timestamp)) + "\n")
+    
+    _prune_profiles(directory, settings.PROFILE_MAX_FILES)
+    return path
+
+def _should_profile(scope) -> bool:
+    if settings.PROFILE_HEADER_TOKEN:
+        header = settings.PROFILE_HEADER.lower().encode("latin-1")
+        for name, value in scope.get("headers", []):
+            if name == header and value.decode("latin-1") == settings.PROFILE_HEADER_TOKEN:
+                return True
+    return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling a sampled fraction of requests
+    
+    A request is profiled with probability PROFILE_SAMPLE_RATE, or when it
+    carries the PROFILE_HEADER header set to PROFILE_HEADER_TOKEN. The
+    profiler follows the event loop thread, where the search endpoints run;
+    work handed to thread pools (e.g. summary generation) is not included,
+    while unprofiled requests running on the event loop at the same time are.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        
+        body = []
+        status = {"code": 500}
+        
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.append(message.get("body", b""))
+            return message
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        if settings.PROFILE_MODE == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(threading.get_ident(), settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            profiler.start()
+        
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if isinstance(profiler, StackSampler):
+                profiler.stop()
+            else:
+                profiler.disable()
+            _profile_lock.release()
+            
+            route = scope.get("route")
+            record = {
+                "method": scope["method"],
+                "endpoint": getattr(route, "path", scope["path"]),
+                "query": _extract_query(scope, b"".join(body)),
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2)
+            }
+            try:
+                path = await run_in_threadpool(write_profile, profiler, record)
+                logger.info(f"Profiled {record['method']} {record['endpoint']} in {record['duration_ms']}ms: {path}")
+            except Exception as e:
+                logger.error(f"Writing profile failed: {e}")
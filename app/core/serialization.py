@@ -0,0 +1,31 @@
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+from pydantic_core import to_json
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized in a single pass by pydantic-core
+    
+    Models are written straight from their validated fields, skipping the
+    jsonable_encoder round trip and the re-validation against response_model
+    that FastAPI does for returned objects. `include` projects the output
+    as in model_dump.
+    """
+    
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        media_type: Optional[str] = None,
+        background: Optional[BackgroundTask] = None,
+        include: Optional[Any] = None
+    ):
+        # Set before the base class renders the content
+        self.include = include
+        super().__init__(content, status_code, headers, media_type, background)
+    
+    def render(self, content: Any) -> bytes:
+        return to_json(content, include=self.include)
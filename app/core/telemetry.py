@@ -0,0 +1,250 @@
+import json
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.serialization import FastJSONResponse
+
+# Latency buckets in seconds, from sub-millisecond stages up to LLM generation
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+class Counter:
+    """Monotonic counter with labels"""
+    
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), 0.0)]
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    """Fixed-bucket histogram with labels"""
+    
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: [per-bucket counts (last one is +Inf), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+    
+    @contextmanager
+    def time(self, *label_values: str):
+        """Observe the duration of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for label_values, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_text = _format_labels(self.labels + ("le",), label_values + (le,))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+# Registry of all application metrics
+STAGE_SECONDS = Histogram(
+    "movsearch_stage_seconds",
+    "Time spent in each processing stage",
+    ("stage", "mode")
+)
+SEARCH_SECONDS = Histogram(
+    "movsearch_search_seconds",
+    "Total time of a search service call",
+    ("mode",)
+)
+REQUEST_SECONDS = Histogram(
+    "movsearch_http_request_seconds",
+    "HTTP request latency by endpoint",
+    ("method", "endpoint", "status")
+)
+CACHE_HITS = Counter("movsearch_cache_hits_total", "Cache hits", ("cache",))
+CACHE_MISSES = Counter("movsearch_cache_misses_total", "Cache misses", ("cache",))
+ES_ERRORS = Counter("movsearch_es_errors_total", "Failed Elasticsearch requests", ("operation",))
+GENERATED_TOKENS = Counter("movsearch_generated_tokens_total", "Tokens generated by the summary model")
+SUMMARIES = Counter("movsearch_summaries_total", "Summaries returned, by the path that produced them", ("source",))
+
+REGISTRY = [
+    STAGE_SECONDS, SEARCH_SECONDS, REQUEST_SECONDS,
+    CACHE_HITS, CACHE_MISSES, ES_ERRORS, GENERATED_TOKENS, SUMMARIES
+]
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Stage timings and debug details of the HTTP request being handled
+_request_trace: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_trace", default=None)
+
+@contextmanager
+def request_trace():
+    """Collect stage timings for the enclosed request"""
+    trace = {"start": time.perf_counter(), "stages": {}, "details": {}}
+    token = _request_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _request_trace.reset(token)
+
+@contextmanager
+def stage(name: str, mode: str):
+    """
+    Time a processing stage into STAGE_SECONDS and, inside a request, into
+    that request's trace
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, mode, time.perf_counter() - start)
+
+def observe_stage(name: str, mode: str, seconds: float) -> None:
+    """Record an already measured stage duration, as stage() does"""
+    STAGE_SECONDS.observe(seconds, name, mode)
+    trace = _request_trace.get()
+    if trace is not None:
+        trace["stages"][name] = trace["stages"].get(name, 0.0) + seconds
+
+def annotate(key: str, value: float) -> None:
+    """Add a debug value (e.g. ES took time, candidate count) to the current request trace"""
+    trace = _request_trace.get()
+    if trace is not None:
+        trace["details"][key] = trace["details"].get(key, 0) + value
+
+def server_timing_header(trace: Dict[str, Any]) -> str:
+    """Format a request trace as a Server-Timing header value"""
+    entries = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in trace["stages"].items()]
+    entries.append(f"total;dur={(time.perf_counter() - trace['start']) * 1000:.2f}")
+    return ", ".join(entries)
+
+def traced_json_response(
+    content: Any,
+    mode: str,
+    debug: bool = False,
+    fields: Optional[List[str]] = None
+) -> FastJSONResponse:
+    """
+    Serialize an endpoint result as a timed stage and attach the request
+    trace as a Server-Timing header
+    
+    Args:
+        content: Endpoint result (models, lists or dicts)
+        mode: Stage label, e.g. the search mode
+        debug: Also return the raw trace details (ES took time, candidate
+            counts) as JSON in the X-Search-Debug header
+        fields: Projection applied to every item of a list result
+    """
+    with stage("serialize", mode):
+        response = FastJSONResponse(content, include={"__all__": set(fields)} if fields else None)
+    
+    trace = _request_trace.get()
+    if trace is not None:
+        response.headers["Server-Timing"] = server_timing_header(trace)
+        # Let cross-origin frontends read the timings in the browser
+        response.headers["Timing-Allow-Origin"] = "*"
+        if debug:
+            details = dict(trace["details"])
+            if isinstance(content, list):
+                details["returned"] = len(content)
+            response.headers["X-Search-Debug"] = json.dumps(details)
+    return response
+
+@contextmanager
+def es_call(operation: str):
+    """Count failed Elasticsearch requests for the enclosed call"""
+    try:
+        yield
+    except Exception:
+        ES_ERRORS.inc(operation)
+        raise
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template and
+    opening the per-request trace used for Server-Timing
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = {"code": 500}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        start = time.perf_counter()
+        try:
+            with request_trace():
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Use the route template so IDs do not explode label cardinality
+            endpoint = getattr(route, "path", "unmatched")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                endpoint,
+                str(status["code"])
+            )
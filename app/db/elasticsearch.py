@@ -2,11 +2,27 @@ from elasticsearch import Elasticsearch
 from app.core.config import settings
 
 def get_elasticsearch_client() -> Elasticsearch:
-    """Create and return an Elasticsearch client"""
-    return Elasticsearch(
+    """
+    Create and return an Elasticsearch client
+    
+    With ES_FIXTURE_MODE=record the live client is wrapped to capture all
+    traffic; with ES_FIXTURE_MODE=replay a local stand-in serves the
+    captured responses instead.
+    """
+    if settings.ES_FIXTURE_MODE == "replay":
+        from app.db.fixtures import ReplayClient
+        return ReplayClient(settings.ES_FIXTURE_PATH)
+    
+    client = Elasticsearch(
         settings.ELASTICSEARCH_URL,
         api_key=settings.ELASTICSEARCH_API_KEY
     )
+    
+    if settings.ES_FIXTURE_MODE == "record":
+        from app.db.fixtures import RecordingClient
+        return RecordingClient(client, settings.ES_FIXTURE_PATH)
+    
+    return client
 
 # Create a singleton instance of the Elasticsearch client
 es_client = get_elasticsearch_client()
\ No newline at end of file
@@ -0,0 +1,157 @@
+import gzip
+import json
+import hashlib
+import importlib
+import threading
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Query vectors are rounded before hashing so fixtures recorded on one
+# machine still match the slightly different floats produced on another
+_FLOAT_DIGITS = 4
+
+class FixtureMissError(LookupError):
+    """Raised in replay mode when a request was never recorded"""
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value, _FLOAT_DIGITS)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+def request_key(method: str, kwargs: Dict[str, Any]) -> str:
+    """Stable key for an Elasticsearch call"""
+    canonical = json.dumps([method, _normalize(kwargs)], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+def _response_body(response: Any) -> Any:
+    """Plain JSON body of an elasticsearch-py response"""
+    return getattr(response, "body", response)
+
+def _error_record(error: Exception) -> Dict[str, Any]:
+    """Enough of a failed call to raise the same exception type on replay"""
+    meta = getattr(error, "meta", None)
+    return {
+        "error": f"{type(error).__name__}: {error}",
+        "error_type": f"{type(error).__module__}.{type(error).__qualname__}",
+        "error_message": getattr(error, "message", str(error)),
+        "error_status": getattr(meta, "status", None),
+        "error_body": getattr(error, "body", None)
+    }
+
+def _rebuild_error(method: str, record: Dict[str, Any]) -> Exception:
+    """
+    The exception a recorded call failed with, e.g. NotFoundError, so code
+    handling it behaves as it did live; FixtureMissError if it cannot be rebuilt
+    """
+    fallback = FixtureMissError(f"Recorded {method} call failed: {record['error']}")
+    module_name, _, class_name = record.get("error_type", "").rpartition(".")
+    try:
+        error_class = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError):
+        return fallback
+    if not isinstance(error_class, type) or not issubclass(error_class, Exception):
+        return fallback
+    
+    from elasticsearch import ApiError
+    try:
+        if issubclass(error_class, ApiError):
+            from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+            meta = ApiResponseMeta(
+                status=record.get("error_status") or 500,
+                http_version="1.1",
+                headers=HttpHeaders(),
+                duration=0.0,
+                node=NodeConfig("http", "fixture", 9200)
+            )
+            return error_class(record["error_message"], meta, record.get("error_body"))
+        return error_class(record["error_message"])
+    except Exception:
+        return fallback
+
+class RecordingClient:
+    """
+    Wraps a live Elasticsearch client and appends every request/response
+    pair to a gzipped JSON-lines fixture file
+    """
+    
+    def __init__(self, client, path: str, namespace: str = "", lock: Optional[threading.Lock] = None):
+        self._client = client
+        self._path = path
+        self._namespace = namespace
+        self._lock = lock or threading.Lock()
+        if not namespace:
+            logger.info(f"Recording Elasticsearch traffic to {path}")
+    
+    def __getattr__(self, name: str):
+        target = getattr(self._client, name)
+        method = self._namespace + name
+        if not callable(target):
+            # Namespaced APIs such as es.indices are recorded as "indices.<method>"
+            if hasattr(target, "perform_request"):
+                return RecordingClient(target, self._path, method + ".", self._lock)
+            return target
+        
+        def call(**kwargs):
+            record = {"key": request_key(method, kwargs), "method": method}
+            try:
+                response = target(**kwargs)
+            except Exception as e:
+                record.update(_error_record(e))
+                self._write(record)
+                raise
+            record["response"] = _response_body(response)
+            self._write(record)
+            return response
+        
+        return call
+    
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            with gzip.open(self._path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+class ReplayClient:
+    """
+    Stand-in for the Elasticsearch client that serves responses from a
+    fixture file written by RecordingClient, without any network access
+    """
+    
+    def __init__(self, path: str):
+        self._responses = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                self._responses[record["key"]] = record
+        logger.info(f"Replaying {len(self._responses)} Elasticsearch responses from {path}")
+    
+    def __getattr__(self, method: str):
+        if method.startswith("_"):
+            raise AttributeError(method)
+        return _ReplayCall(self._responses, method)
+
+class _ReplayCall:
+    """A replayed API method; attribute access reaches namespaced APIs (es.indices.get_mapping)"""
+    
+    def __init__(self, responses: Dict[str, Any], method: str):
+        self._responses = responses
+        self._method = method
+    
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _ReplayCall(self._responses, f"{self._method}.{name}")
+    
+    def __call__(self, **kwargs):
+        record = self._responses.get(request_key(self._method, kwargs))
+        if record is None:
+            raise FixtureMissError(f"No recorded response for {self._method}({kwargs})")
+        if "error" in record:
+            raise _rebuild_error(self._method, record)
+        return record["response"]
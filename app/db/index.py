@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
 from elasticsearch import Elasticsearch
 from app.core.config import settings
 from app.db.elasticsearch import es_client
@@ -8,6 +10,14 @@ def create_index(es: Elasticsearch = es_client) -> None:
         es.indices.create(
             index=settings.INDEX_NAME,
             body={
+                "settings": {
+                    "analysis": {
+                        "analyzer": {
+                            # Case- and accent-insensitive, keeps digits ("2001", "Se7en")
+                            "suggest": {"tokenizer": "standard", "filter": ["lowercase", "asciifolding"]}
+                        }
+                    }
+                },
                 "mappings": {
                     "properties": {
                         "id": {"type": "keyword"},
@@ -26,6 +36,7 @@ def create_index(es: Elasticsearch = es_client) -> None:
                         "popularity": {"type": "float"},
                         "tagline": {"type": "text", "analyzer": "english"},
                         "genres": {"type": "text", "analyzer": "english"},
+                        "genre_list": {"type": "keyword"},
                         "production_companies": {"type": "text"},
                         "production_countries": {"type": "text"},
                         "spoken_languages": {"type": "text"},
@@ -42,6 +53,10 @@ def create_index(es: Elasticsearch = es_client) -> None:
                         "profit": {"type": "float"},
                         "roi": {"type": "float"},
                         "imdb_url": {"type": "keyword"},
+                        "title_suggest": {"type": "completion", "analyzer": "suggest"},
+                        "people_suggest": {"type": "completion", "analyzer": "suggest"},
+                        # Precomputed neighbours (id, score), only ever read back
+                        "similar": {"type": "object", "enabled": False},
                         "embedding": {"type": "dense_vector", "dims": settings.VECTOR_DIMENSIONS}
                     }
                 }
@@ -62,4 +77,63 @@ def delete_index(es: Elasticsearch = es_client) -> bool:
         return True
     except Exception as e:
         print(f"Error deleting index: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def split_list(value) -> List[str]:
+    """Split a comma-separated field (genres, cast, director) into its items"""
+    if not isinstance(value, str):
+        return []
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def genre_terms(genres) -> List[str]:
+    """Split a comma-separated genres string into the genre_list keywords used for facets"""
+    return split_list(genres)
+
+def _word_suffixes(text: str, max_words: int) -> List[str]:
+    """The text starting at each of its first max_words words"""
+    words = text.split()
+    return [" ".join(words[i:]) for i in range(min(len(words), max_words))]
+
+def suggest_inputs(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completion entries for the typeahead
+    
+    Titles and people names are also entered from each later word, so
+    "knight" finds "The Dark Knight" and "nolan" finds "Christopher Nolan".
+    Entries are weighted by popularity.
+    """
+    try:
+        weight = max(0, int(float(doc.get("popularity") or 0)))
+    except (ValueError, TypeError):
+        weight = 0
+    
+    titles = []
+    for field in ("title", "original_title"):
+        if isinstance(doc.get(field), str):
+            titles.extend(_word_suffixes(doc[field], 4))
+    
+    people = split_list(doc.get("director")) + split_list(doc.get("cast"))[:settings.SUGGEST_CAST_NAMES]
+    names = [suffix for name in people for suffix in _word_suffixes(name, 3)]
+    
+    entries = {}
+    if titles:
+        entries["title_suggest"] = {"input": list(dict.fromkeys(titles)), "weight": weight}
+    if names:
+        entries["people_suggest"] = {"input": list(dict.fromkeys(names)), "weight": weight}
+    return entries
+
+def mark_indexed(es: Elasticsearch = es_client) -> str:
+    """
+    Stamp the index mapping with the time of the last (re)index, so
+    caches derived from the whole catalog know to refresh
+    """
+    indexed_at = datetime.now(timezone.utc).isoformat()
+    es.indices.put_mapping(index=settings.INDEX_NAME, meta={"indexed_at": indexed_at})
+    return indexed_at
+
+def get_index_generation(es: Elasticsearch = es_client) -> Optional[str]:
+    """The indexed_at stamp written by mark_indexed, or None for an unstamped index"""
+    mapping = es.indices.get_mapping(index=settings.INDEX_NAME)
+    for name in mapping:
+        return mapping[name]["mappings"].get("_meta", {}).get("indexed_at")
+    return None
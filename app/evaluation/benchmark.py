@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Callable, Optional
+
+import numpy as np
+
+import app.services.search as search_service
+from app.db.elasticsearch import es_client
+from app.evaluation.queries import llm_evaluation_queries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'evaluation_results'
+)
+BASELINE_FILE = 'benchmark_baseline.json'
+
+# Per-thread stage timings of the call currently being measured
+_stages = threading.local()
+
+def _add_stage(stage: str, seconds: float) -> None:
+    timings = getattr(_stages, "timings", None)
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+class _TimedClient:
+    """Elasticsearch client proxy that attributes call time to the "es" stage"""
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def __getattr__(self, name: str):
+        target = getattr(self._client, name)
+        if not callable(target):
+            return target
+        
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return target(*args, **kwargs)
+            finally:
+                _add_stage("es", time.perf_counter() - start)
+        
+        return call
+
+@contextmanager
+def _timed_embeddings():
+    """Attribute get_embedding time to the "embed" stage while benchmarking"""
+    original = search_service.get_embedding
+    
+    def timed(text):
+        start = time.perf_counter()
+        try:
+            return original(text)
+        finally:
+            _add_stage("embed", time.perf_counter() - start)
+    
+    search_service.get_embedding = timed
+    try:
+        yield
+    finally:
+        search_service.get_embedding = original
+
+def latency_summary(latencies_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max of a list of latencies in milliseconds"""
+    if not latencies_ms:
+        return {}
+    values = np.asarray(latencies_ms)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(values.mean()),
+        "max_ms": float(values.max())
+    }
+
+def run_benchmark(
+    fn: Callable[[Any], Any],
+    inputs: List[Any],
+    concurrency: int = 1,
+    repeat: int = 1,
+    warmup: int = 1
+) -> Dict[str, Any]:
+    """
+    Call fn once per input (repeated) at the given concurrency
+    
+    Returns:
+        Latency percentiles, throughput, error count and the mean time per stage
+    """
+    for item in inputs[:warmup]:
+        try:
+            fn(item)
+        except Exception:
+            pass
+    
+    def measure(item):
+        _stages.timings = {}
+        start = time.perf_counter()
+        error = None
+        try:
+            fn(item)
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        timings, _stages.timings = _stages.timings, None
+        timings["other"] = max(0.0, elapsed - sum(timings.values()))
+        return elapsed, timings, error
+    
+    work = inputs * repeat
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        measurements = list(pool.map(measure, work))
+    wall = time.perf_counter() - wall_start
+    
+    ok = [m for m in measurements if m[2] is None]
+    stage_totals = {}
+    for _, timings, _ in ok:
+        for stage, seconds in timings.items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+    
+    result = {
+        "requests": len(measurements),
+        "errors": len(measurements) - len(ok),
+        "concurrency": concurrency,
+        "qps": len(ok) / wall if wall > 0 else 0.0,
+        "stages_mean_ms": {stage: total * 1000 / len(ok) for stage, total in stage_totals.items()} if ok else {}
+    }
+    result.update(latency_summary([m[0] * 1000 for m in ok]))
+    
+    if len(ok) < len(measurements):
+        result["first_error"] = next(m[2] for m in measurements if m[2] is not None)
+    
+    return result
+
+def benchmark_search_functions(
+    queries: List[str],
+    concurrency: int = 1,
+    size: int = 10,
+    repeat: int = 1
+) -> Dict[str, Any]:
+    """
+    Benchmark the search service functions directly, with a per-stage breakdown
+    
+    Movie lookups are reported twice: get_movie_by_id_cold clears the
+    document cache before every call so each one reaches Elasticsearch, and
+    get_movie_by_id_warm measures lookups served from the primed cache.
+    """
+    es = _TimedClient(es_client)
+    results = {}
+    
+    with _timed_embeddings():
+        targets = {
+            "semantic_search": lambda q: search_service.semantic_search(query=q, size=size, es=es),
+            "keyword_search": lambda q: search_service.keyword_search(query=q, size=size, es=es),
+            "hybrid_search": lambda q: search_service.hybrid_search(query=q, size=size, es=es)
+        }
+        for name, fn in targets.items():
+            logger.info(f"Benchmarking {name}")
+            results[name] = run_benchmark(fn, queries, concurrency=concurrency, repeat=repeat)
+        
+        movie_ids = list(dict.fromkeys(
+            m.id for q in queries[:5] for m in search_service.keyword_search(query=q, size=size)
+        ))
+        if movie_ids:
+            def get_movie_cold(movie_id):
+                search_service.clear_document_cache()
+                return search_service.get_movie_by_id(movie_id, es=es)
+            
+            logger.info("Benchmarking get_movie_by_id (cold)")
+            results["get_movie_by_id_cold"] = run_benchmark(
+                get_movie_cold,
+                movie_ids,
+                concurrency=concurrency,
+                repeat=repeat
+            )
+            
+            logger.info("Benchmarking get_movie_by_id (warm)")
+            for movie_id in movie_ids:
+                search_service.get_movie_by_id(movie_id)
+            results["get_movie_by_id_warm"] = run_benchmark(
+                lambda movie_id: search_service.get_movie_by_id(movie_id, es=es),
+                movie_ids,
+                concurrency=concurrency,
+                repeat=repeat
+            )
+    
+    return results
+
+def benchmark_embedding_backends(
+    queries: List[str],
+    backends: List[str],
+    repeat: int = 1
+) -> Dict[str, Any]:
+    """
+    Compare single-query encode latency across embedding backends, plus
+    cosine parity of every backend against the first one
+    """
+    from app.services.vector import load_embedding_model, check_embedding_parity
+    
+    results = {}
+    models = {}
+    for backend in backends:
+        models[backend], _ = load_embedding_model(backend)
+        logger.info(f"Benchmarking {backend} query embeddings")
+        results[f"embed_{backend}"] = run_benchmark(models[backend].encode, queries, concurrency=1, repeat=repeat)
+    
+    reference = backends[0]
+    for backend in backends[1:]:
+        parity = check_embedding_parity(models[reference], models[backend], queries)
+        results[f"embed_{backend}"]["parity_vs_" + reference] = parity
+        logger.info(f"{backend} vs {reference} parity: min cosine {parity['min_cosine']:.4f}")
+    
+    return results
+
+def benchmark_http_endpoints(
+    base_url: str,
+    queries: List[str],
+    concurrency: int = 1,
+    size: int = 10,
+    repeat: int = 1,
+    api_prefix: str = "/api/v1"
+) -> Dict[str, Any]:
+    """
+    Benchmark the HTTP search endpoints of a running server
+    
+    The server's document cache cannot be cleared from here, so movie
+    lookups are split into http_get_movie_cold, the first request for each
+    id (a cache miss unless the server served that id within
+    DOCUMENT_CACHE_TTL_SECONDS), and http_get_movie_warm, the repeated
+    requests served from the cache.
+    """
+    import httpx
+    
+    results = {}
+    with httpx.Client(base_url=base_url, timeout=60.0) as client:
+        def post(path):
+            def call(q):
+                response = client.post(f"{api_prefix}/movies/{path}", json={"query": q, "size": size})
+                response.raise_for_status()
+                return response.json()
+            return call
+        
+        for path in ["semantic-search", "keyword-search", "hybrid-search"]:
+            logger.info(f"Benchmarking POST {path}")
+            results[f"http_{path}"] = run_benchmark(post(path), queries, concurrency=concurrency, repeat=repeat)
+        
+        movie_ids = list(dict.fromkeys(m["id"] for q in queries[:5] for m in post("keyword-search")(q)))
+        if movie_ids:
+            def get_movie(movie_id):
+                response = client.get(f"{api_prefix}/movies/{movie_id}")
+                response.raise_for_status()
+            
+            logger.info("Benchmarking GET movie by id (cold)")
+            results["http_get_movie_cold"] = run_benchmark(get_movie, movie_ids, concurrency=concurrency, warmup=0)
+            logger.info("Benchmarking GET movie by id (warm)")
+            results["http_get_movie_warm"] = run_benchmark(get_movie, movie_ids, concurrency=concurrency, repeat=repeat)
+    
+    return results
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    Flag targets whose p95 latency rose, or whose QPS fell, by more than
+    the tolerance relative to the baseline
+    """
+    regressions = []
+    for target, current in results.items():
+        previous = baseline.get(target)
+        if not previous or "p95_ms" not in current or "p95_ms" not in previous:
+            continue
+        
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append({
+                "target": target,
+                "metric": "p95_ms",
+                "baseline": previous["p95_ms"],
+                "current": current["p95_ms"]
+            })
+        if current["qps"] < previous["qps"] * (1 - tolerance):
+            regressions.append({
+                "target": target,
+                "metric": "qps",
+                "baseline": previous["qps"],
+                "current": current["qps"]
+            })
+    
+    return regressions
+
+# Settings that must match the baseline for its latencies to be comparable
+BASELINE_CONFIG_KEYS = ("concurrency", "size", "repeat", "num_queries")
+
+def baseline_config_differences(config: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Benchmark settings that differ from the baseline run, as {key: {baseline, current}}"""
+    return {
+        key: {"baseline": baseline.get(key), "current": config.get(key)}
+        for key in BASELINE_CONFIG_KEYS
+        if baseline.get(key) != config.get(key)
+    }
+
+def run_benchmark_suite(
+    query_data: List[Dict[str, str]] = None,
+    concurrency: int = 1,
+    size: int = 10,
+    repeat: int = 1,
+    base_url: Optional[str] = None,
+    results_dir: str = DEFAULT_RESULTS_DIR,
+    tolerance: float = 0.2,
+    update_baseline: bool = False,
+    embedding_backends: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite, save the results as JSON and compare them
+    against the stored baseline
+    
+    The comparison is skipped (and the differences reported under
+    "baseline_mismatch") when the baseline was run with a different
+    concurrency, size, repeat or query count.
+    
+    Args:
+        query_data: List of dictionaries with query and intent
+        concurrency: Number of requests in flight at once
+        size: Number of results per search
+        repeat: Number of passes over the query set
+        base_url: Also benchmark the HTTP endpoints of the server at this URL
+        results_dir: Directory for results and the baseline
+        tolerance: Relative change flagged as a regression
+        update_baseline: Store these results as the new baseline
+        embedding_backends: Also compare query encoding across these backends
+    
+    Returns:
+        Dictionary with benchmark results and regressions
+    """
+    if query_data is None:
+        query_data = llm_evaluation_queries
+    queries = [q["query"] for q in query_data]
+    
+    os.makedirs(results_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    logger.info(f"Benchmarking {len(queries)} queries at concurrency {concurrency}")
+    targets = benchmark_search_functions(queries, concurrency=concurrency, size=size, repeat=repeat)
+    if embedding_backends:
+        targets.update(benchmark_embedding_backends(queries, embedding_backends, repeat=repeat))
+    if base_url:
+        targets.update(benchmark_http_endpoints(base_url, queries, concurrency=concurrency, size=size, repeat=repeat))
+    
+    config = {
+        "concurrency": concurrency,
+        "size": size,
+        "repeat": repeat,
+        "num_queries": len(queries)
+    }
+    
+    baseline_file = os.path.join(results_dir, BASELINE_FILE)
+    regressions = []
+    baseline_mismatch = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        baseline_mismatch = baseline_config_differences(config, baseline)
+        if baseline_mismatch:
+            logger.warning(
+                "Not comparing against the baseline, its configuration differs: "
+                + ", ".join(f"{key} {diff['baseline']} -> {diff['current']}" for key, diff in baseline_mismatch.items())
+            )
+        else:
+            regressions = compare_to_baseline(targets, baseline.get("targets", {}), tolerance)
+        for regression in regressions:
+            logger.warning(
+                f"Regression in {regression['target']} {regression['metric']}: "
+                f"{regression['baseline']:.2f} -> {regression['current']:.2f}"
+            )
+    
+    results = {
+        "timestamp": timestamp,
+        **config,
+        "targets": targets,
+        "regressions": regressions,
+        "baseline_mismatch": baseline_mismatch
+    }
+    
+    json_file = os.path.join(results_dir, f'benchmark_{timestamp}.json')
+    with open(json_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Benchmark completed. Results saved to {json_file}")
+    
+    if update_baseline or not os.path.exists(baseline_file):
+        with open(baseline_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Baseline updated: {baseline_file}")
+    
+    return results
@@ -0,0 +1,225 @@
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+def relevance_matrix(relevance_lists: Sequence[Sequence[float]], depth: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Stack ranked relevance lists into a (queries x ranks) matrix
+    
+    Args:
+        relevance_lists: One list of (graded) relevance scores per query, in rank order
+        depth: Number of ranks to keep (default: longest list)
+    
+    Returns:
+        The zero-padded relevance matrix and the length of each list
+    """
+    lengths = np.array([len(r) for r in relevance_lists], dtype=int)
+    if depth is None:
+        depth = int(lengths.max()) if len(lengths) else 0
+    
+    matrix = np.zeros((len(relevance_lists), depth))
+    for i, relevance in enumerate(relevance_lists):
+        row = np.asarray(relevance[:depth], dtype=float)
+        matrix[i, :len(row)] = row
+    
+    return matrix, np.minimum(lengths, depth)
+
+def compute_metrics(
+    relevance: np.ndarray,
+    k: Optional[int] = None,
+    lengths: Optional[np.ndarray] = None,
+    num_relevant: Optional[np.ndarray] = None,
+    threshold: float = 1.0
+) -> Dict[str, np.ndarray]:
+    """
+    Compute per-query NDCG@k, P@k, MRR, recall@k and AP@k in one pass
+    
+    Works on any (..., queries x ranks) array, e.g. a whole weight grid at once.
+    
+    Args:
+        relevance: Graded relevance matrix, ranks along the last axis
+        k: Cutoff rank (default: all ranks)
+        lengths: Number of real results per query; P@k divides by
+            min(k, length) as in evaluate_search_results (default: k)
+        num_relevant: Total relevant documents per query for recall/AP
+            (default: relevant documents within the matrix)
+        threshold: Minimum grade counted as relevant for the binary metrics
+    
+    Returns:
+        Dictionary of per-query metric arrays
+    """
+    relevance = np.asarray(relevance, dtype=float)
+    if k is None:
+        k = relevance.shape[-1]
+    
+    top = relevance[..., :k]
+    ranks = np.arange(1, top.shape[-1] + 1)
+    binary = (top >= threshold).astype(float)
+    
+    # NDCG with the ideal ordering of the same judged list (as calculate_ndcg)
+    discounts = 1.0 / np.log2(ranks + 1)
+    gains = 2.0 ** top - 1
+    dcg = gains @ discounts
+    idcg = -np.sort(-gains, axis=-1) @ discounts
+    ndcg = np.divide(dcg, idcg, out=np.zeros_like(dcg), where=idcg > 0)
+    
+    hits = binary.sum(axis=-1)
+    denominator = np.minimum(lengths, k) if lengths is not None else np.full(hits.shape, k)
+    precision = np.divide(hits, denominator, out=np.zeros_like(hits), where=denominator > 0)
+    
+    # Reciprocal rank of the first relevant result
+    first_hit = np.argmax(binary, axis=-1)
+    mrr = np.where(hits > 0, 1.0 / (first_hit + 1), 0.0)
+    
+    if num_relevant is None:
+        num_relevant = (relevance >= threshold).sum(axis=-1)
+    num_relevant = np.asarray(num_relevant, dtype=float)
+    recall = np.divide(hits, num_relevant, out=np.zeros_like(hits), where=num_relevant > 0)
+    
+    precision_at_rank = np.cumsum(binary, axis=-1) / ranks
+    ap_denominator = np.minimum(num_relevant, k)
+    ap = np.divide(
+        (precision_at_rank * binary).sum(axis=-1),
+        ap_denominator,
+        out=np.zeros_like(hits),
+        where=ap_denominator > 0
+    )
+    
+    return {"ndcg": ndcg, "precision": precision, "mrr": mrr, "recall": recall, "ap": ap}
+
+def bootstrap_ci(
+    values: np.ndarray,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0
+) -> Dict[str, np.ndarray]:
+    """
+    Percentile bootstrap confidence interval of the mean over queries
+    
+    Args:
+        values: Per-query values with queries along the last axis; leading
+            axes (e.g. weight grid points) are resampled with the same indices
+        n_resamples: Number of bootstrap resamples
+        confidence: Confidence level of the interval
+        seed: Random seed, for reproducible reports
+    
+    Returns:
+        Dictionary with the mean, lower and upper bound
+    """
+    values = np.asarray(values, dtype=float)
+    n_queries = values.shape[-1]
+    rng = np.random.default_rng(seed)
+    
+    # Resampled means via query counts: (resamples x queries) @ (queries x ...)
+    samples = rng.integers(0, n_queries, size=(n_resamples, n_queries))
+    offsets = np.arange(n_resamples)[:, None] * n_queries
+    counts = np.bincount((samples + offsets).ravel(), minlength=n_resamples * n_queries)
+    counts = counts.reshape(n_resamples, n_queries)
+    means = (counts @ np.moveaxis(values, -1, 0).reshape(n_queries, -1)) / n_queries
+    means = means.reshape((n_resamples,) + values.shape[:-1])
+    
+    alpha = (1.0 - confidence) / 2
+    return {
+        "mean": values.mean(axis=-1),
+        "low": np.quantile(means, alpha, axis=0),
+        "high": np.quantile(means, 1.0 - alpha, axis=0)
+    }
+
+def paired_bootstrap_test(
+    a: np.ndarray,
+    b: np.ndarray,
+    n_resamples: int = 10000,
+    seed: Optional[int] = 0
+) -> Dict[str, float]:
+    """
+    Paired bootstrap test of the mean difference between two methods
+    evaluated on the same queries
+    
+    Returns:
+        Dictionary with the mean difference (a - b) and a two-sided p-value
+    """
+    diff = np.asarray(a, dtype=float) - np.asarray(b, dtype=float)
+    observed = float(diff.mean())
+    
+    rng = np.random.default_rng(seed)
+    samples = diff[rng.integers(0, len(diff), size=(n_resamples, len(diff)))].mean(axis=1)
+    
+    # Shift the resampled differences to the null hypothesis of no difference
+    centered = samples - observed
+    p_value = float((np.abs(centered) >= abs(observed)).mean())
+    return {"mean_difference": observed, "p_value": p_value}
+
+def paired_permutation_test(
+    a: np.ndarray,
+    b: np.ndarray,
+    n_resamples: int = 10000,
+    seed: Optional[int] = 0
+) -> Dict[str, float]:
+    """
+    Paired randomization (sign-flip) test of the mean difference between
+    two methods evaluated on the same queries
+    
+    Returns:
+        Dictionary with the mean difference (a - b) and a two-sided p-value
+    """
+    diff = np.asarray(a, dtype=float) - np.asarray(b, dtype=float)
+    observed = float(diff.mean())
+    
+    rng = np.random.default_rng(seed)
+    signs = rng.choice([-1.0, 1.0], size=(n_resamples, len(diff)))
+    samples = (signs * diff).mean(axis=1)
+    
+    p_value = float((np.abs(samples) >= abs(observed) - 1e-12).mean())
+    return {"mean_difference": observed, "p_value": p_value}
+
+def summarize_methods(
+    method_relevance: Dict[str, List[List[float]]],
+    k: Optional[int] = None,
+    n_resamples: int = 10000,
+    confidence: float = 0.95,
+    seed: Optional[int] = 0,
+    threshold: float = 1.0
+) -> Dict[str, Dict]:
+    """
+    Metrics with bootstrap confidence intervals per method, and paired
+    significance tests between every pair of methods
+    
+    Args:
+        method_relevance: Ranked relevance lists per method, aligned by query
+        threshold: Minimum grade counted as relevant for the binary metrics
+    
+    Returns:
+        Dictionary with "methods" and "comparisons" entries
+    """
+    per_method = {}
+    for method, relevance_lists in method_relevance.items():
+        if not relevance_lists:
+            continue
+        matrix, lengths = relevance_matrix(relevance_lists, depth=k)
+        per_method[method] = compute_metrics(matrix, k=k, lengths=lengths, threshold=threshold)
+    
+    methods = {}
+    for method, metrics in per_method.items():
+        methods[method] = {}
+        for name, values in metrics.items():
+            ci = bootstrap_ci(values, n_resamples=n_resamples, confidence=confidence, seed=seed)
+            methods[method][name] = {
+                "mean": float(ci["mean"]),
+                "ci_low": float(ci["low"]),
+                "ci_high": float(ci["high"])
+            }
+    
+    comparisons = {}
+    names = list(per_method)
+    for i, first in enumerate(names):
+        for second in names[i + 1:]:
+            if len(per_method[first]["ndcg"]) != len(per_method[second]["ndcg"]):
+                continue
+            comparisons[f"{first}_vs_{second}"] = {
+                name: {
+                    "bootstrap": paired_bootstrap_test(per_method[first][name], per_method[second][name], n_resamples, seed),
+                    "permutation": paired_permutation_test(per_method[first][name], per_method[second][name], n_resamples, seed)
+                }
+                for name in ("ndcg", "precision")
+            }
+    
+    return {"methods": methods, "comparisons": comparisons, "confidence": confidence}
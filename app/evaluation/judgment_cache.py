@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JUDGMENT_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'evaluation_results',
+    'relevance_judgments.sqlite'
+)
+
+class JudgmentStore:
+    """
+    Persistent store of relevance judgments keyed by
+    (query, intent, movie id, judge model, prompt version)
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_JUDGMENT_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS judgments (
+                query TEXT NOT NULL,
+                intent TEXT NOT NULL,
+                movie_id TEXT NOT NULL,
+                judge TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                relevance INTEGER NOT NULL,
+                probability REAL NOT NULL,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (query, intent, movie_id, judge, prompt_version)
+            )"""
+        )
+        self._conn.commit()
+    
+    def get_many(
+        self,
+        query: str,
+        intent: str,
+        movie_ids: List[str],
+        judge: str,
+        prompt_version: str
+    ) -> Dict[str, Tuple[int, float]]:
+        """Return the stored (relevance, probability) for each known movie id"""
+        if not movie_ids:
+            return {}
+        
+        placeholders = ",".join("?" for _ in movie_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""SELECT movie_id, relevance, probability FROM judgments
+                    WHERE query = ? AND intent = ? AND judge = ? AND prompt_version = ?
+                    AND movie_id IN ({placeholders})""",
+                [query, intent or "", judge, prompt_version, *movie_ids]
+            ).fetchall()
+        
+        return {movie_id: (relevance, probability) for movie_id, relevance, probability in rows}
+    
+    def put_many(
+        self,
+        query: str,
+        intent: str,
+        judgments: Dict[str, Tuple[int, float]],
+        judge: str,
+        prompt_version: str
+    ) -> None:
+        """Store (relevance, probability) judgments keyed by movie id"""
+        if not judgments:
+            return
+        
+        created_at = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                """INSERT OR REPLACE INTO judgments
+                   (query, intent, movie_id, judge, prompt_version, relevance, probability, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (query, intent or "", movie_id, judge, prompt_version, int(relevance), float(probability), created_at)
+                    for movie_id, (relevance, probability) in judgments.items()
+                ]
+            )
+            self._conn.commit()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_store: Optional[JudgmentStore] = None
+_store_lock = threading.Lock()
+
+def get_judgment_store(db_path: str = DEFAULT_JUDGMENT_DB) -> JudgmentStore:
+    """Return the shared judgment store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None or _store.db_path != db_path:
+            _store = JudgmentStore(db_path)
+        return _store
@@ -12,9 +12,13 @@ logger = logging.getLogger(__name__)
 class LLMEvaluator:
     """Uses QWen 3 0.5B to evaluate search relevance"""
     
+    # Bump whenever _build_prompt changes so cached judgments are not reused
+    PROMPT_VERSION = "v1"
+    
     def __init__(self, model_name: str = "Qwen/Qwen2.5-0.5B"):
         """Initialize the LLM evaluator with QWen model"""
         logger.info(f"Initializing LLM evaluator with model: {model_name}")
+        self.model_name = model_name
         
         # Check if CUDA is available
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -28,6 +32,14 @@ class LLMEvaluator:
                 trust_remote_code=True,
                 torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
             )
+            
+            # Batched judging reads the last position, so pad on the left
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            self.yes_token_ids = self._answer_token_ids("Yes")
+            self.no_token_ids = self._answer_token_ids("No")
+            
             logger.info(f"Successfully loaded {model_name}")
             self.model_loaded = True
         except Exception as e:
@@ -67,6 +79,74 @@ class LLMEvaluator:
             logger.error(f"Error using QWen for relevance evaluation: {e}")
             return self._heuristic_evaluate(query, movie, query_intent)
     
+    @property
+    def judge_id(self) -> str:
+        """Identifies who produced a judgment, for caching"""
+        return self.model_name if self.model_loaded else "heuristic"
+    
+    def evaluate_relevance_batch(
+        self,
+        query: str,
+        movies: List[Movie],
+        query_intent: str = None,
+        batch_size: int = 16
+    ) -> Tuple[List[int], List[float], str]:
+        """
+        Evaluate the relevance of many movies to a query in padded forward passes.
+        Returns binary relevance (1/0) and the probability of "Yes" for each movie,
+        and the judge that produced them: the model name, or "heuristic" when
+        the model is not loaded or the forward pass failed.
+        """
+        if not movies:
+            return [], [], self.judge_id
+        
+        if not self.model_loaded:
+            scores = [self._heuristic_evaluate(query, movie, query_intent) for movie in movies]
+            return scores, [float(score) for score in scores], "heuristic"
+        
+        prompts = [self._build_prompt(query, movie, query_intent) for movie in movies]
+        
+        try:
+            probabilities = self.score_prompts(prompts, batch_size=batch_size)
+        except Exception as e:
+            logger.error(f"Error using QWen for batched relevance evaluation: {e}")
+            scores = [self._heuristic_evaluate(query, movie, query_intent) for movie in movies]
+            return scores, [float(score) for score in scores], "heuristic"
+        
+        return [1 if p >= 0.5 else 0 for p in probabilities], probabilities, self.model_name
+    
+    def score_prompts(self, prompts: List[str], batch_size: int = 16) -> List[float]:
+        """
+        Probability that the next token after each prompt is "Yes" rather than "No",
+        read directly from the logits of a single forward pass per batch
+        """
+        probabilities = []
+        
+        for start in range(0, len(prompts), batch_size):
+            batch = prompts[start:start + batch_size]
+            inputs = self.tokenizer(batch, return_tensors="pt", padding=True).to(self.model.device)
+            
+            # Positions must skip the left padding
+            position_ids = (inputs.attention_mask.cumsum(-1) - 1).clamp(min=0)
+            
+            with torch.no_grad():
+                logits = self.model(**inputs, position_ids=position_ids).logits[:, -1, :].float()
+            
+            yes_logits = torch.logsumexp(logits[:, self.yes_token_ids], dim=-1)
+            no_logits = torch.logsumexp(logits[:, self.no_token_ids], dim=-1)
+            probabilities.extend(torch.sigmoid(yes_logits - no_logits).tolist())
+        
+        return probabilities
+    
+    def _answer_token_ids(self, answer: str) -> List[int]:
+        """First token ids of the spellings the model may use for an answer"""
+        token_ids = set()
+        for variant in (answer, f" {answer}", answer.lower(), f" {answer.lower()}"):
+            encoded = self.tokenizer.encode(variant, add_special_tokens=False)
+            if encoded:
+                token_ids.add(encoded[0])
+        return sorted(token_ids)
+    
     def _build_prompt(self, query: str, movie: Movie, query_intent: str = None) -> str:
         """Build prompt for QWen to evaluate relevance"""
         
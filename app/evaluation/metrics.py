@@ -3,17 +3,38 @@ import json
 import numpy as np
 import os
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from app.models.movie import Movie
-from app.services.search import semantic_search, keyword_search, hybrid_search
-from app.evaluation.llm_evaluator import LLMEvaluator
+from app.services.search import semantic_search, keyword_search, hybrid_search, retrieve_hybrid_candidates, _source_to_movie
+from app.evaluation.judgment_cache import get_judgment_store
+from app.evaluation.ir_metrics import compute_metrics, bootstrap_ci, summarize_methods
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize LLM evaluator
-evaluator = LLMEvaluator()
+# Lazy loading for the LLM evaluator
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+def get_evaluator():
+    """Return the shared LLMEvaluator, loading its model on first use (thread-safe)"""
+    global _evaluator
+    
+    if _evaluator is None:
+        with _evaluator_lock:
+            if _evaluator is None:
+                # Imported here so that importing this module does not pull in torch
+                from app.evaluation.llm_evaluator import LLMEvaluator
+                _evaluator = LLMEvaluator()
+    
+    return _evaluator
+
+def warmup_evaluator() -> None:
+    """Load the evaluator model ahead of the first judgment"""
+    get_evaluator()
 
 def calculate_ndcg(relevance_scores: List[int], k: int = None) -> float:
     """
@@ -48,6 +69,36 @@ def calculate_ndcg(relevance_scores: List[int], k: int = None) -> float:
     # Return NDCG
     return dcg / idcg if idcg > 0 else 0.0
 
+def judge_movies(query: str, query_intent: str, movies: List[Movie]) -> Tuple[List[int], List[float]]:
+    """
+    Get binary relevance and P(relevant) for each movie, only asking the
+    LLM about (query, movie) pairs that are not in the judgment store
+    """
+    evaluator = get_evaluator()
+    store = get_judgment_store()
+    judge = evaluator.judge_id
+    cached = store.get_many(query, query_intent, [movie.id for movie in movies if movie.id], judge, evaluator.PROMPT_VERSION)
+    judgments = [cached.get(movie.id) if movie.id else None for movie in movies]
+    
+    unseen = [i for i, judgment in enumerate(judgments) if judgment is None]
+    if unseen:
+        unseen_scores, unseen_probabilities, produced_by = evaluator.evaluate_relevance_batch(
+            query, [movies[i] for i in unseen], query_intent
+        )
+        for i, score, probability in zip(unseen, unseen_scores, unseen_probabilities):
+            judgments[i] = (score, probability)
+        # A failed LLM pass falls back to the heuristic; file those verdicts
+        # under "heuristic" so they are never read back as LLM judgments
+        store.put_many(
+            query,
+            query_intent,
+            {movies[i].id: judgments[i] for i in unseen if movies[i].id},
+            produced_by,
+            evaluator.PROMPT_VERSION
+        )
+    
+    return [score for score, _ in judgments], [probability for _, probability in judgments]
+
 def evaluate_search_results(query: str, query_intent: str, movies: List[Movie], top_k: int = 10) -> Dict[str, Any]:
     """
     Evaluate search results using LLM for relevance judgments
@@ -74,12 +125,8 @@ def evaluate_search_results(query: str, query_intent: str, movies: List[Movie],
     # Take top k results
     top_results = movies[:min(top_k, len(movies))]
     
-    # Get relevance judgments from LLM
-    relevance_scores = []
-    for movie in top_results:
-        # Get binary relevance score (0 or a)
-        relevance = evaluator.evaluate_relevance(query, movie, query_intent)
-        relevance_scores.append(relevance)
+    # Get relevance judgments, reusing stored ones
+    relevance_scores, relevance_probabilities = judge_movies(query, query_intent, top_results)
     
     # Calculate metrics
     relevant_count = sum(relevance_scores)
@@ -92,23 +139,44 @@ def evaluate_search_results(query: str, query_intent: str, movies: List[Movie],
         "relevant_count": relevant_count,
         "total_results": len(top_results),
         "relevance_scores": relevance_scores,
+        "relevance_probabilities": relevance_probabilities,
         "search_scores": [movie.score for movie in top_results],
         "query": query,
         "query_intent": query_intent
     }
 
+def _submit_searches(pool: ThreadPoolExecutor, query: str, top_k: int) -> Dict[str, Any]:
+    """Start the three searches for a query on the pool"""
+    return {
+        "semantic": pool.submit(semantic_search, query=query, size=top_k),
+        "keyword": pool.submit(keyword_search, query=query, size=top_k),
+        "hybrid": pool.submit(
+            hybrid_search,
+            query=query,
+            size=top_k,
+            bm25_multiplier=0.5,
+            vector_multiplier=0.5
+        )
+    }
+
 def compare_search_methods(
     query_data: List[Dict[str, str]], 
     top_k: int = 10,
-    results_dir: str = None
+    results_dir: str = None,
+    concurrency: int = 4
 ) -> Dict[str, Any]:
     """
     Compare different search methods using LLM-based evaluation
     
+    Searches for all queries run concurrently against Elasticsearch, while
+    judging stays on the calling thread (the single judge worker) and
+    consumes queries in order, so results are deterministic.
+    
     Args:
         query_data: List of dictionaries with query and intent
         top_k: Number of top results to evaluate
         results_dir: Directory to save results
+        concurrency: Number of searches in flight at once
     
     Returns:
         Dictionary with comparison results
@@ -136,47 +204,51 @@ def compare_search_methods(
     logger.addHandler(file_handler)
     
     logger.info(f"Starting LLM-based evaluation with {len(query_data)} queries")
-    logger.info(f"Using QWEN model: {evaluator.model_loaded}")
+    logger.info(f"Using QWEN model: {get_evaluator().model_loaded}")
     
-    for query_item in query_data:
-        query = query_item["query"]
-        intent = query_item.get("intent", "general")
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="eval-search") as pool:
+        pending = [_submit_searches(pool, q["query"], top_k) for q in query_data]
         
-        logger.info(f"Evaluating query: {query} (Intent: {intent})")
-        
-        try:
-            # Run each search method
-            semantic_results = semantic_search(query=query, size=top_k)
-            keyword_results = keyword_search(query=query, size=top_k)
-            hybrid_results = hybrid_search(
-                query=query, 
-                size=top_k,
-                bm25_multiplier=0.5,
-                vector_multiplier=0.5
-            )
-            
-            # Log result titles for debugging
-            logger.info(f"Semantic search results: {[m.title for m in semantic_results[:3]]}")
-            logger.info(f"Keyword search results: {[m.title for m in keyword_results[:3]]}")
-            logger.info(f"Hybrid search results: {[m.title for m in hybrid_results[:3]]}")
-            
-            # Evaluate each method
-            semantic_eval = evaluate_search_results(query, intent, semantic_results, top_k)
-            keyword_eval = evaluate_search_results(query, intent, keyword_results, top_k)
-            hybrid_eval = evaluate_search_results(query, intent, hybrid_results, top_k)
-            
-            # Log evaluation results
-            logger.info(f"Semantic - P@{top_k}: {semantic_eval['precision@k']:.2f}, NDCG: {semantic_eval['ndcg']:.2f}, Relevant: {semantic_eval['relevant_count']}/{semantic_eval['total_results']}")
-            logger.info(f"Keyword - P@{top_k}: {keyword_eval['precision@k']:.2f}, NDCG: {keyword_eval['ndcg']:.2f}, Relevant: {keyword_eval['relevant_count']}/{keyword_eval['total_results']}")
-            logger.info(f"Hybrid - P@{top_k}: {hybrid_eval['precision@k']:.2f}, NDCG: {hybrid_eval['ndcg']:.2f}, Relevant: {hybrid_eval['relevant_count']}/{hybrid_eval['total_results']}")
+        for query_item, searches in zip(query_data, pending):
+            query = query_item["query"]
+            intent = query_item.get("intent", "general")
             
-            # Store results
-            results["semantic"].append(semantic_eval)
-            results["keyword"].append(keyword_eval)
-            results["hybrid"].append(hybrid_eval)
+            logger.info(f"Evaluating query: {query} (Intent: {intent})")
             
-        except Exception as e:
-            logger.error(f"Error evaluating query '{query}': {e}")
+            try:
+                # Collect each search method's results
+                semantic_results = searches["semantic"].result()
+                keyword_results = searches["keyword"].result()
+                hybrid_results = searches["hybrid"].result()
+                
+                # Log result titles for debugging
+                logger.info(f"Semantic search results: {[m.title for m in semantic_results[:3]]}")
+                logger.info(f"Keyword search results: {[m.title for m in keyword_results[:3]]}")
+                logger.info(f"Hybrid search results: {[m.title for m in hybrid_results[:3]]}")
+                
+                # Judge the union of all three result lists in one batch
+                unique_movies = {}
+                for movie in semantic_results[:top_k] + keyword_results[:top_k] + hybrid_results[:top_k]:
+                    unique_movies.setdefault(movie.id, movie)
+                judge_movies(query, intent, list(unique_movies.values()))
+                
+                # Evaluate each method (judgments now come from the store)
+                semantic_eval = evaluate_search_results(query, intent, semantic_results, top_k)
+                keyword_eval = evaluate_search_results(query, intent, keyword_results, top_k)
+                hybrid_eval = evaluate_search_results(query, intent, hybrid_results, top_k)
+                
+                # Log evaluation results
+                logger.info(f"Semantic - P@{top_k}: {semantic_eval['precision@k']:.2f}, NDCG: {semantic_eval['ndcg']:.2f}, Relevant: {semantic_eval['relevant_count']}/{semantic_eval['total_results']}")
+                logger.info(f"Keyword - P@{top_k}: {keyword_eval['precision@k']:.2f}, NDCG: {keyword_eval['ndcg']:.2f}, Relevant: {keyword_eval['relevant_count']}/{keyword_eval['total_results']}")
+                logger.info(f"Hybrid - P@{top_k}: {hybrid_eval['precision@k']:.2f}, NDCG: {hybrid_eval['ndcg']:.2f}, Relevant: {hybrid_eval['relevant_count']}/{hybrid_eval['total_results']}")
+                
+                # Store results
+                results["semantic"].append(semantic_eval)
+                results["keyword"].append(keyword_eval)
+                results["hybrid"].append(hybrid_eval)
+                
+            except Exception as e:
+                logger.error(f"Error evaluating query '{query}': {e}")
     
     # Calculate summary statistics
     for method in ["semantic", "keyword", "hybrid"]:
@@ -194,6 +266,18 @@ def compare_search_methods(
             "worst_query": min(results[method], key=lambda x: x["precision@k"])["query"]
         }
     
+    # Metrics with bootstrap confidence intervals and paired significance tests.
+    # NDCG is graded by P(relevant); the binary metrics count P >= 0.5 as
+    # relevant, the same cut as relevance_scores.
+    results["significance"] = summarize_methods(
+        {
+            method: [r.get("relevance_probabilities", []) for r in results[method]]
+            for method in ["semantic", "keyword", "hybrid"]
+        },
+        k=top_k,
+        threshold=0.5
+    )
+    
     # Save detailed results to JSON file
     json_file = os.path.join(results_dir, f'llm_detailed_results_{timestamp}.json')
     with open(json_file, 'w') as f:
@@ -203,15 +287,29 @@ def compare_search_methods(
     
     return results
 
+def _fuse_top_k(bm25_scores: np.ndarray, vector_scores: np.ndarray, bm25_weights: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Rank candidates for every weight at once
+    
+    Returns a (weights x ranks) matrix of candidate indices, ordered the same
+    way hybrid_search orders them (stable sort, ties keep BM25 order)
+    """
+    combined = np.outer(bm25_weights, bm25_scores) + np.outer(1.0 - bm25_weights, vector_scores)
+    return np.argsort(-combined, axis=1, kind="stable")[:, :top_k]
+
 def find_optimal_weights(
     query_data: List[Dict[str, str]],
-    weight_steps: int = 5,
+    weight_steps: int = 20,
     top_k: int = 10,
     results_dir: str = None
 ) -> Dict[str, Any]:
     """
     Find optimal weights for hybrid search using LLM-based evaluation
     
+    Candidates are retrieved once per query with normalized BM25 and vector
+    scores; the whole weight grid is then fused and scored offline in NumPy,
+    so dense grids cost no extra Elasticsearch round-trips.
+    
     Args:
         query_data: List of dictionaries with query and intent
         weight_steps: Number of steps for weight grid search
@@ -237,63 +335,88 @@ def find_optimal_weights(
     
     logger.info(f"Finding optimal weights with {len(query_data)} queries")
     
+    bm25_weights = np.arange(weight_steps + 1) / weight_steps
+    precision_per_query = []
+    ndcg_per_query = []
+    
+    for query_item in query_data:
+        query = query_item["query"]
+        intent = query_item.get("intent", "general")
+        
+        try:
+            # Retrieve once, with the same candidate pool hybrid_search uses
+            candidates = retrieve_hybrid_candidates(query, retrieve_size=min(top_k * 3, 100))
+            if not candidates:
+                # No results score zero at every weight, as in a per-weight search
+                precision_per_query.append(np.zeros(len(bm25_weights)))
+                ndcg_per_query.append(np.zeros(len(bm25_weights)))
+                logger.info(f"  Query: {query[:30]}... - no candidates")
+                continue
+            
+            bm25_scores = np.array([c["bm25_score"] for c in candidates])
+            vector_scores = np.array([c["vector_score"] for c in candidates])
+            top_indices = _fuse_top_k(bm25_scores, vector_scores, bm25_weights, top_k)
+            
+            # Judge every candidate that reaches the top k for some weight
+            judged = np.unique(top_indices)
+            judged_scores, _ = judge_movies(
+                query, intent, [_source_to_movie(candidates[i]["source"], score=0.0) for i in judged]
+            )
+            relevance_by_candidate = np.zeros(len(candidates))
+            relevance_by_candidate[judged] = judged_scores
+            
+            grid_metrics = compute_metrics(relevance_by_candidate[top_indices])
+            precision, ndcg = grid_metrics["precision"], grid_metrics["ndcg"]
+            precision_per_query.append(precision)
+            ndcg_per_query.append(ndcg)
+            
+            logger.info(
+                f"  Query: {query[:30]}... - {len(judged)} judged, "
+                f"P@{top_k} range: {precision.min():.2f}-{precision.max():.2f}, "
+                f"NDCG range: {ndcg.min():.2f}-{ndcg.max():.2f}"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error optimizing for query '{query}': {e}")
+    
     best_avg_precision = 0
     best_avg_ndcg = 0
     best_weights_precision = (0.5, 0.5)
     best_weights_ndcg = (0.5, 0.5)
     all_results = {}
     
-    # Test different weight combinations
-    for i in range(weight_steps + 1):
-        bm25_weight = i / weight_steps
-        vector_weight = 1.0 - bm25_weight
-        
-        logger.info(f"Testing weights: BM25={bm25_weight:.2f}, Vector={vector_weight:.2f}")
-        
-        results_for_weight = []
+    if precision_per_query:
+        # Bootstrap the whole grid at once: (weights x queries)
+        precision_ci = bootstrap_ci(np.stack(precision_per_query, axis=1))
+        ndcg_ci = bootstrap_ci(np.stack(ndcg_per_query, axis=1))
+        avg_precision = precision_ci["mean"]
+        avg_ndcg = ndcg_ci["mean"]
         
-        for query_item in query_data:
-            query = query_item["query"]
-            intent = query_item.get("intent", "general")
+        for i, bm25_weight in enumerate(bm25_weights):
+            bm25_weight = float(bm25_weight)
+            vector_weight = 1.0 - bm25_weight
             
-            try:
-                hybrid_results = hybrid_search(
-                    query=query,
-                    size=top_k,
-                    bm25_multiplier=bm25_weight,
-                    vector_multiplier=vector_weight
-                )
-                
-                eval_result = evaluate_search_results(query, intent, hybrid_results, top_k)
-                results_for_weight.append(eval_result)
-                
-                logger.info(f"  Query: {query[:30]}... - P@{top_k}: {eval_result['precision@k']:.2f}, NDCG: {eval_result['ndcg']:.2f}")
-                
-            except Exception as e:
-                logger.error(f"Error optimizing for query '{query}': {e}")
-        
-        if not results_for_weight:  # Skip if no results
-            continue
+            weight_key = f"bm25_{bm25_weight:.2f}_vector_{vector_weight:.2f}"
+            all_results[weight_key] = {
+                "avg_precision": float(avg_precision[i]),
+                "avg_ndcg": float(avg_ndcg[i]),
+                "precision_ci": [float(precision_ci["low"][i]), float(precision_ci["high"][i])],
+                "ndcg_ci": [float(ndcg_ci["low"][i]), float(ndcg_ci["high"][i])],
+                "weights": {"bm25": bm25_weight, "vector": vector_weight}
+            }
             
-        avg_precision = float(np.mean([r["precision@k"] for r in results_for_weight]))
-        avg_ndcg = float(np.mean([r["ndcg"] for r in results_for_weight]))
-        
-        weight_key = f"bm25_{bm25_weight:.2f}_vector_{vector_weight:.2f}"
-        all_results[weight_key] = {
-            "avg_precision": avg_precision,
-            "avg_ndcg": avg_ndcg,
-            "weights": {"bm25": bm25_weight, "vector": vector_weight}
-        }
-        
-        logger.info(f"Average precision: {avg_precision:.4f}, Average NDCG: {avg_ndcg:.4f}")
+            logger.info(f"Weights BM25={bm25_weight:.2f}, Vector={vector_weight:.2f} - Average precision: {avg_precision[i]:.4f}, Average NDCG: {avg_ndcg[i]:.4f}")
         
-        if avg_precision > best_avg_precision:
-            best_avg_precision = avg_precision
-            best_weights_precision = (bm25_weight, vector_weight)
+        # First weight reaching the maximum wins, as in a sequential scan
+        best_precision_index = int(np.argmax(avg_precision))
+        if avg_precision[best_precision_index] > best_avg_precision:
+            best_avg_precision = float(avg_precision[best_precision_index])
+            best_weights_precision = (float(bm25_weights[best_precision_index]), 1.0 - float(bm25_weights[best_precision_index]))
         
-        if avg_ndcg > best_avg_ndcg:
-            best_avg_ndcg = avg_ndcg
-            best_weights_ndcg = (bm25_weight, vector_weight)
+        best_ndcg_index = int(np.argmax(avg_ndcg))
+        if avg_ndcg[best_ndcg_index] > best_avg_ndcg:
+            best_avg_ndcg = float(avg_ndcg[best_ndcg_index])
+            best_weights_ndcg = (float(bm25_weights[best_ndcg_index]), 1.0 - float(bm25_weights[best_ndcg_index]))
     
     # Save results to JSON file
     results = {
@@ -1,10 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.endpoints import movies, summary
 from app.core.config import settings
+from app.core.telemetry import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.serialization import FastJSONResponse
 import os
 import logging
-import torch
+import time
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -13,6 +18,7 @@ app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API for semantic and keyword search of movies",
     version="2.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS
@@ -22,8 +28,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["Server-Timing", "X-Search-Debug", "X-Next-Cursor", "X-Facets"],  # Latency breakdown, paging and facets
 )
 
+# Compress large responses when the client accepts gzip
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.GZIP_MINIMUM_SIZE,
+    compresslevel=settings.GZIP_COMPRESS_LEVEL
+)
+
+# Profile sampled requests (PROFILE_SAMPLE_RATE / PROFILE_HEADER)
+app.add_middleware(ProfilingMiddleware)
+
+# Record per-endpoint request latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(
     movies.router,
@@ -35,15 +55,24 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/search",
     tags=["summarize"]
 )
+# Time spent loading models at startup, reported on /health
+cold_start = {}
+
 @app.on_event("startup")
 async def startup_event():
     try:
         os.environ['TRANSFORMERS_CACHE'] = '/app/model_cache'
         os.environ['HF_HOME'] = '/app/model_cache'
         
+        # Models are loaded lazily; warm them up here so the first request is fast
+        start = time.perf_counter()
+        from app.services.vector import warmup_embedding_model
+        warmup_embedding_model()
+        
         from app.services.summary import get_model_and_tokenizer
         get_model_and_tokenizer()
-        logger.info("Models loaded successfully")
+        cold_start["seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"Models loaded successfully, cold start took {cold_start['seconds']:.2f}s")
         
     except Exception as e:
         logger.error(f"Startup error: {e}")
@@ -68,10 +97,26 @@ async def health_check():
         from app.services.summary import _model, _tokenizer
         models_loaded = _model is not None and _tokenizer is not None
         
+        from app.services.memory import get_memory_stats
+        from app.services import summary, vector
+        
         return {
             "status": "healthy",
             "gpu_available": gpu_available,
-            "models_loaded": models_loaded
+            "models_loaded": models_loaded,
+            "memory": get_memory_stats(),
+            "cold_start": {
+                **cold_start,
+                "summary_model": summary.load_info,
+                "embedding_model": vector.load_info
+            }
         }
     except Exception as e:
-        return {"status": "error", "detail": str(e)}
\ No newline at end of file
+        return {"status": "error", "detail": str(e)}
+
+@app.get("/metrics", tags=["status"], response_class=PlainTextResponse)
+async def metrics():
+    """
+    Latency histograms and counters in the Prometheus text format
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,22 @@
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Dict, Any, List, Literal, Union
 
 class QueryRequest(BaseModel):
     query: str
-    size: Optional[int] = 10
+    size: Optional[int] = Field(10, ge=1)
     min_score: Optional[float] = 0.0
     filters: Optional[Dict[str, Any]] = None
     weights: Optional[Dict[str, float]] = None
-
+    fields: Optional[List[str]] = None
+    facets: bool = False
+    paginate: bool = False
+    cursor: Optional[str] = None
+    
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, value):
+        return validate_projection(value)
+    
     class Config:
         schema_extra = {
             "example": {
@@ -18,17 +27,27 @@ class QueryRequest(BaseModel):
                     "vote_average": {"min": 7.0},
                     "genres": ["Science Fiction", "Action"]
                 },
-                "weights": {"bm25": 0.7, "vector": 0.3}
+                "weights": {"bm25": 0.7, "vector": 0.3},
+                "fields": ["id", "title", "poster_path", "release_date"]
             }
         }
 
 class KeywordSearchRequest(BaseModel):
     query: str
-    size: int = 10
+    size: int = Field(10, ge=1)
     year_min: Optional[int] = None
     year_max: Optional[int] = None
     rating_min: Optional[float] = None
     genres: Optional[str] = None
+    fields: Optional[List[str]] = None
+    facets: bool = False
+    paginate: bool = False
+    cursor: Optional[str] = None
+    
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, value):
+        return validate_projection(value)
     
     class Config:
         schema_extra = {
@@ -58,7 +77,59 @@ class Movie(BaseModel):
     imdb_rating: Optional[float] = None
     score: float = 0.0
 
+class BatchSearchQuery(QueryRequest):
+    mode: Literal["semantic", "keyword", "hybrid"] = "hybrid"
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery] = Field(..., min_length=1)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "queries": [
+                    {"query": "science fiction with aliens", "mode": "hybrid", "size": 5, "weights": {"bm25": 0.3, "vector": 0.7}},
+                    {"query": "christopher nolan", "mode": "keyword", "size": 5},
+                    {"query": "feel-good family movie", "mode": "semantic", "filters": {"vote_average": {"min": 7.0}}}
+                ]
+            }
+        }
+
+class FacetBucket(BaseModel):
+    key: Union[str, int]
+    count: int
+
+class Facets(BaseModel):
+    genres: List[FacetBucket]
+    decades: List[FacetBucket]
+    ratings: List[FacetBucket]
+
+class TitleSuggestion(BaseModel):
+    id: str
+    title: str
+    text: str  # Matched entry, e.g. the original title
+
+class SuggestResponse(BaseModel):
+    titles: List[TitleSuggestion]
+    people: List[str]
+
+class BatchSearchResult(BaseModel):
+    results: List[Movie] = []
+    facets: Optional[Facets] = None
+    error: Optional[str] = None
+
+class BatchSearchResponse(BaseModel):
+    results: List[BatchSearchResult]
+
 class MovieList(BaseModel):
     movies: List[Movie]
     total: int
-    query: Optional[str] = None
\ No newline at end of file
+    query: Optional[str] = None
+
+def validate_projection(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Check that a response projection only names Movie fields; the id is always kept"""
+    if fields is None:
+        return None
+    unknown = [field for field in fields if field not in Movie.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields if "id" in fields else ["id"] + fields
@@ -1,12 +1,31 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
 from app.models.movie import Movie
 
 class MovieSummaryRequest(BaseModel):
-    movies: List[Movie]
+    movies: List[Movie] = []
+    movie_ids: Optional[List[str]] = None
     query: str = ""
+    max_latency_ms: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_movies_or_ids(self):
+        # An explicit empty movies list is still a valid (empty) request
+        if "movies" not in self.model_fields_set and self.movie_ids is None:
+            raise ValueError("Either movies or movie_ids must be provided")
+        return self
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "movie_ids": ["27205", "157336", "155"],
+                "query": "christopher nolan movies",
+                "max_latency_ms": 2000
+            }
+        }
 
 class MovieSummaryResponse(BaseModel):
     summary: str
     query: str = ""
-    movie_count: int
\ No newline at end of file
+    movie_count: int
+    source: str = "llm"
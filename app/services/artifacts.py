@@ -0,0 +1,55 @@
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+def read_manifest(artifacts_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return the artifact manifest, or an empty one if none was built"""
+    artifacts_dir = artifacts_dir or settings.MODEL_ARTIFACTS_DIR
+    try:
+        with open(os.path.join(artifacts_dir, MANIFEST_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def get_artifact_entry(component: str, model_name: str, artifacts_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Manifest entry of a pre-serialized model, with its absolute path, if
+    one was built for this model name
+    
+    Args:
+        component: Artifact name, e.g. "summary" or "embedding"
+        model_name: Model the caller expects; stale artifacts are ignored
+    """
+    artifacts_dir = artifacts_dir or settings.MODEL_ARTIFACTS_DIR
+    entry = read_manifest(artifacts_dir).get("components", {}).get(component)
+    if not entry or entry.get("model_name") != model_name:
+        return None
+    
+    path = os.path.join(artifacts_dir, entry["path"])
+    if not os.path.isdir(path):
+        return None
+    return {**entry, "path": path}
+
+def get_artifact_path(component: str, model_name: str, artifacts_dir: Optional[str] = None) -> Optional[str]:
+    """Directory of a pre-serialized model, if one was built for this model name"""
+    entry = get_artifact_entry(component, model_name, artifacts_dir)
+    return entry["path"] if entry else None
+
+def record_artifact(component: str, model_name: str, artifacts_dir: str, **details) -> None:
+    """Add a built component to the manifest"""
+    manifest = read_manifest(artifacts_dir)
+    manifest.setdefault("components", {})[component] = {
+        "model_name": model_name,
+        "path": component,
+        "created_at": datetime.now().isoformat(),
+        **details
+    }
+    with open(os.path.join(artifacts_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
@@ -0,0 +1,115 @@
+import gc
+import os
+import sys
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional
+from app.core.config import settings
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, /proc is used instead
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_reclaim_lock = threading.Lock()
+_reclaim_count = 0
+_last_reclaim_ms = 0.0
+_last_reclaim_at = 0.0
+
+def get_rss_bytes() -> Optional[int]:
+    """Return the resident set size of this process, or None if unknown"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _loaded_torch():
+    """torch if some model already imported it; never imports it ourselves"""
+    return sys.modules.get("torch")
+
+def get_vram_usage() -> Optional[Dict[str, int]]:
+    """Return allocated/reserved/total VRAM in bytes, or None without CUDA"""
+    torch = _loaded_torch()
+    if torch is None or not torch.cuda.is_available():
+        return None
+    return {
+        "allocated": torch.cuda.memory_allocated(),
+        "reserved": torch.cuda.memory_reserved(),
+        "total": torch.cuda.get_device_properties(0).total_memory
+    }
+
+def _over_high_water(rss: Optional[int], vram: Optional[Dict[str, int]]) -> bool:
+    if rss is not None and rss > settings.MEMORY_RSS_HIGH_WATER_MB * 1024 * 1024:
+        return True
+    if vram is not None and vram["reserved"] > settings.MEMORY_VRAM_HIGH_WATER_FRACTION * vram["total"]:
+        return True
+    return False
+
+def maybe_reclaim_memory() -> bool:
+    """
+    Reclaim memory only when RSS or reserved VRAM is above its high-water mark
+    
+    Below the thresholds this is a couple of counter reads, so it is safe to
+    call after every generation without defeating the CUDA caching allocator.
+    Reclaims are spaced by MEMORY_RECLAIM_COOLDOWN_SECONDS, since RSS often
+    stays high after a collection.
+    
+    Returns:
+        True if a reclaim was performed
+    """
+    global _reclaim_count, _last_reclaim_ms, _last_reclaim_at
+    
+    if time.monotonic() - _last_reclaim_at < settings.MEMORY_RECLAIM_COOLDOWN_SECONDS and _reclaim_count:
+        return False
+    
+    if not _over_high_water(get_rss_bytes(), get_vram_usage()):
+        return False
+    
+    # Another worker is already reclaiming
+    if not _reclaim_lock.acquire(blocking=False):
+        return False
+    
+    try:
+        start = time.perf_counter()
+        gc.collect()
+        torch = _loaded_torch()
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        _last_reclaim_ms = (time.perf_counter() - start) * 1000
+        _reclaim_count += 1
+        _last_reclaim_at = time.monotonic()
+        logger.info(f"Memory high-water mark crossed, reclaimed in {_last_reclaim_ms:.1f}ms")
+    finally:
+        _reclaim_lock.release()
+    
+    return True
+
+def get_memory_stats() -> Dict[str, Any]:
+    """Memory usage, thresholds and reclaim counters for the health endpoint"""
+    rss = get_rss_bytes()
+    vram = get_vram_usage()
+    
+    stats = {
+        "rss_mb": round(rss / 1024 / 1024, 1) if rss is not None else None,
+        "rss_high_water_mb": settings.MEMORY_RSS_HIGH_WATER_MB,
+        "reclaim_count": _reclaim_count,
+        "last_reclaim_ms": round(_last_reclaim_ms, 2)
+    }
+    
+    if vram is not None:
+        stats.update({
+            "vram_allocated_mb": round(vram["allocated"] / 1024 / 1024, 1),
+            "vram_reserved_mb": round(vram["reserved"] / 1024 / 1024, 1),
+            "vram_total_mb": round(vram["total"] / 1024 / 1024, 1),
+            "vram_high_water_fraction": settings.MEMORY_VRAM_HIGH_WATER_FRACTION
+        })
+    
+    return stats
@@ -1,27 +1,89 @@
-from elasticsearch import Elasticsearch
-from typing import List, Dict, Any, Optional
+from elasticsearch import Elasticsearch, NotFoundError
+from typing import List, Dict, Any, Optional, Tuple
 from app.db.elasticsearch import es_client
+from app.db.index import get_index_generation
 from app.models.movie import Movie
-from app.services.vector import get_embedding
+from app.services.vector import get_embedding, get_embeddings
 from app.core.config import settings
+from app.core.telemetry import SEARCH_SECONDS, CACHE_HITS, CACHE_MISSES, stage, annotate, es_call
 
 import math
+import json
+import time
+import uuid
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
 # from numpy import dot
 # from numpy.linalg import norm
 
-def semantic_search(
-    query: str,
+# Shared LRU cache of document sources (without embeddings):
+# movie id -> (expiry, source)
+_document_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_document_cache_lock = threading.Lock()
+
+# Fields only used inside Elasticsearch (facets, typeahead, similar movies)
+# that results never need
+_INDEX_ONLY_FIELDS = ["genre_list", "title_suggest", "people_suggest", "similar"]
+
+# Fused hybrid result lists of open cursors: key -> (expiry, movies)
+_hybrid_page_cache: "OrderedDict[str, Tuple[float, List[Movie]]]" = OrderedDict()
+_hybrid_page_cache_lock = threading.Lock()
+
+# Facets of the whole catalog: (revalidate at, index generation, facets)
+_global_facets: Optional[Tuple[float, Optional[str], Dict[str, Any]]] = None
+_global_facets_lock = threading.Lock()
+
+# vote_average buckets of the rating facet; "to" is exclusive
+RATING_FACET_RANGES = [
+    {"key": "<5", "to": 5},
+    {"key": "5-6", "from": 5, "to": 6},
+    {"key": "6-7", "from": 6, "to": 7},
+    {"key": "7-8", "from": 7, "to": 8},
+    {"key": "8+", "from": 8}
+]
+
+def _build_filter_clauses(filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Translate request filters into Elasticsearch filter clauses"""
+    filter_clauses = []
+    for field, value in filters.items():
+        if field == "genres" and isinstance(value, list):
+            # Special handling for genres list - create AND LOGIC
+            genre_terms = []
+            for genre in value:
+                # Match genres that contain any of the requested genres
+                genre_terms.append({"match_phrase": {"genres": genre}})
+            
+            if genre_terms:
+                filter_clauses.append({
+                    "bool": {
+                        "must": genre_terms,
+                        # "minimum_should_match": 1
+                    }
+                })
+        elif isinstance(value, list):
+            filter_clauses.append({"terms": {field: value}})
+        elif isinstance(value, dict) and ("min" in value or "max" in value):
+            range_filter = {"range": {field: {}}}
+            if "min" in value:
+                range_filter["range"][field]["gte"] = value["min"]
+            if "max" in value:
+                range_filter["range"][field]["lte"] = value["max"]
+            filter_clauses.append(range_filter)
+        else:
+            filter_clauses.append({"term": {field: value}})
+    
+    return filter_clauses
+
+def build_semantic_query(
+    vector: list,
     size: int = 10,
     min_score: float = 0.0,
     filters: Optional[Dict[str, Any]] = None,
-    es: Elasticsearch = es_client
-) -> List[Movie]:
-    """
-    Search for movies using semantic similarity
-    """
-    # Generate embedding for the query
-    vector = get_embedding(query)
-    
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Elasticsearch request body for a semantic search"""
     # Base query with vector similarity
     script_query = {
         "script_score": {
@@ -35,86 +97,30 @@ def semantic_search(
     
     # Apply filters if provided
     if filters:
-        filter_clauses = []
-        for field, value in filters.items():
-            if field == "genres" and isinstance(value, list):
-                # Special handling for genres list - create AND LOGIC
-                genre_terms = []
-                for genre in value:
-                    # Match genres that contain any of the requested genres
-                    genre_terms.append({"match_phrase": {"genres": genre}})
-                
-                if genre_terms:
-                    filter_clauses.append({
-                        "bool": {
-                            "must": genre_terms,
-                            # "minimum_should_match": 1
-                        }
-                    })
-            elif isinstance(value, list):
-                filter_clauses.append({"terms": {field: value}})
-            elif isinstance(value, dict) and ("min" in value or "max" in value):
-                range_filter = {"range": {field: {}}}
-                if "min" in value:
-                    range_filter["range"][field]["gte"] = value["min"]
-                if "max" in value:
-                    range_filter["range"][field]["lte"] = value["max"]
-                filter_clauses.append(range_filter)
-            else:
-                filter_clauses.append({"term": {field: value}})
-        
         # Use filtered query
         query_body = {
             "bool": {
                 "must": script_query,
-                "filter": filter_clauses
+                "filter": _build_filter_clauses(filters)
             }
         }
     else:
         query_body = script_query
     
-    # Execute search
-    result = es.search(
-        index=settings.INDEX_NAME,
-        body={
-            "size": size,
-            "query": query_body,
-            "min_score": min_score
-        }
-    )
-    
-    # Process results
-    movies = []
-    for hit in result["hits"]["hits"]:
-        source = hit["_source"]
-        movies.append(Movie(
-            id=str(source.get("id", "")),
-            title=source.get("title", ""),
-            overview=source.get("overview", ""),
-            release_date=source.get("release_date", ""),
-            vote_average=source.get("vote_average", 0),
-            popularity=source.get("popularity", 0),
-            genres=source.get("genres", ""),
-            director=source.get("director", ""),
-            cast=source.get("cast", ""),
-            poster_path=source.get("poster_path", ""),
-            tagline=source.get("tagline", ""),
-            runtime=source.get("runtime", 0),
-            imdb_rating=source.get("imdb_rating", 0),
-            score=hit["_score"]
-        ))
-    
-    return movies
+    return {
+        "size": size,
+        "query": query_body,
+        "min_score": min_score,
+        "_source": _source_filter(fields)
+    }
 
-def keyword_search(
+def build_keyword_query(
     query: str,
     size: int = 10,
     filters: Optional[Dict[str, Any]] = None,
-    es: Elasticsearch = es_client
-) -> List[Movie]:
-    """
-    Search for movies using keyword matching
-    """
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Elasticsearch request body for a keyword (BM25) search"""
     # Create the base query
     must_clauses = [{
         "multi_match": {
@@ -123,35 +129,6 @@ def keyword_search(
             "fuzziness": "AUTO"
         }
     }]
-    # Add filters if provided
-    filter_clauses = []
-    if filters:
-        for field, value in filters.items():
-            if field == "genres" and isinstance(value, list):
-                # Special handling for genres list - create AND LOGIC
-                genre_terms = []
-                for genre in value:
-                    # Match genres that contain any of the requested genres
-                    genre_terms.append({"match_phrase": {"genres": genre}})
-                
-                if genre_terms:
-                    filter_clauses.append({
-                        "bool": {
-                            "must": genre_terms,
-                            # "minimum_should_match": 1
-                        }
-                    })
-            elif isinstance(value, list):
-                filter_clauses.append({"terms": {field: value}})
-            elif isinstance(value, dict) and ("min" in value or "max" in value):
-                range_filter = {"range": {field: {}}}
-                if "min" in value:
-                    range_filter["range"][field]["gte"] = value["min"]
-                if "max" in value:
-                    range_filter["range"][field]["lte"] = value["max"]
-                filter_clauses.append(range_filter)
-            else:
-                filter_clauses.append({"term": {field: value}})
     
     # Combine query parts
     query_body = {
@@ -160,168 +137,565 @@ def keyword_search(
         }
     }
     
+    # Add filters if provided
+    filter_clauses = _build_filter_clauses(filters) if filters else []
     if filter_clauses:
         query_body["bool"]["filter"] = filter_clauses
     
+    return {
+        "size": size,
+        "query": query_body,
+        "_source": _source_filter(fields)
+    }
+
+def build_hybrid_query(
+    query: str,
+    retrieve_size: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Elasticsearch request body for the BM25 candidates of a hybrid search"""
+    body = build_keyword_query(query, retrieve_size, filters)
+    # The embedding is needed to re-score the candidates
+    body["_source"] = _source_filter(fields, "embedding") if fields else {"excludes": _INDEX_ONLY_FIELDS}
+    return body
+
+def build_facet_aggs() -> Dict[str, Any]:
+    """Elasticsearch aggregations for the genre, decade and rating facets"""
+    return {
+        "genres": {"terms": {"field": "genre_list", "size": settings.FACET_GENRE_SIZE}},
+        "decades": {"histogram": {"field": "year", "interval": 10, "min_doc_count": 1}},
+        "ratings": {"range": {"field": "vote_average", "ranges": RATING_FACET_RANGES}}
+    }
+
+def parse_facets(aggregations: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert the aggregations of build_facet_aggs to {facet: [{key, count}]}"""
+    return {
+        "genres": [
+            {"key": bucket["key"], "count": bucket["doc_count"]}
+            for bucket in aggregations["genres"]["buckets"]
+        ],
+        "decades": [
+            {"key": int(bucket["key"]), "count": bucket["doc_count"]}
+            for bucket in aggregations["decades"]["buckets"]
+        ],
+        "ratings": [
+            {"key": bucket["key"], "count": bucket["doc_count"]}
+            for bucket in aggregations["ratings"]["buckets"]
+        ]
+    }
+
+def _hits_to_movies(hits: List[Dict[str, Any]], mode: str) -> List[Movie]:
+    """Convert Elasticsearch hits to Movies scored by the ES score"""
+    with stage("hydrate", mode):
+        return [_source_to_movie(hit["_source"], hit["_score"]) for hit in hits]
+
+def _score_candidates(hits: List[Dict[str, Any]], vector: list, mode: str) -> List[Dict[str, Any]]:
+    """Normalize BM25 scores and add the vector similarity of every hit"""
+    candidates = []
+    
+    # Calculate max BM25 score for normalization
+    max_bm25_score = max([hit["_score"] for hit in hits]) if hits else 1.0
+    
+    with stage("rescore", mode):
+        for hit in hits:
+            source = hit["_source"]
+            bm25_score = hit["_score"] / max_bm25_score  # Normalize BM25 score (0-1 range)
+            
+            # Get document embedding and calculate cosine similarity
+            doc_embedding = source.get("embedding", [])
+            if doc_embedding:
+                # Calculate cosine similarity manually since we're outside ES query
+                similarity = cosine_similarity_manual(vector, doc_embedding)
+                
+                candidates.append({
+                    "source": source,
+                    "bm25_score": bm25_score,
+                    "vector_score": similarity
+                })
+    annotate("candidates", len(candidates))
+    
+    return candidates
+
+def _fuse_candidates(
+    candidates: List[Dict[str, Any]],
+    size: int,
+    bm25_multiplier: float,
+    vector_multiplier: float,
+    mode: str
+) -> List[Movie]:
+    """Combine candidate scores with weights and return the top Movies"""
+    with stage("rerank", mode):
+        reranked_results = [
+            dict(candidate, combined_score=(candidate["bm25_score"] * bm25_multiplier) + (candidate["vector_score"] * vector_multiplier))
+            for candidate in candidates
+        ]
+        reranked_results.sort(key=lambda x: x["combined_score"], reverse=True)
+        top_results = reranked_results[:size]
+    
+    with stage("hydrate", mode):
+        return [_source_to_movie(result["source"], result["combined_score"]) for result in top_results]
+
+def _annotate_result(result: Dict[str, Any]) -> None:
+    annotate("es_took_ms", result["took"])
+    annotate("es_hits", len(result["hits"]["hits"]))
+
+@SEARCH_SECONDS.time("semantic")
+def semantic_search(
+    query: str,
+    size: int = 10,
+    min_score: float = 0.0,
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
+    es: Elasticsearch = es_client
+) -> List[Movie]:
+    """
+    Search for movies using semantic similarity
+    
+    Only the requested `fields` are fetched from Elasticsearch.
+    """
+    # Generate embedding for the query
+    with stage("embed", "semantic"):
+        vector = get_embedding(query)
+    
     # Execute search
-    result = es.search(
-        index=settings.INDEX_NAME,
-        body={
-            "size": size,
-            "query": query_body
-        }
-    )
+    with stage("es", "semantic"), es_call("search"):
+        result = es.search(
+            index=settings.INDEX_NAME,
+            body=build_semantic_query(vector, size, min_score, filters, fields)
+        )
+    _annotate_result(result)
     
     # Process results
-    movies = []
-    for hit in result["hits"]["hits"]:
-        source = hit["_source"]
-        movies.append(Movie(
-            id=str(source.get("id", "")),
-            title=source.get("title", ""),
-            overview=source.get("overview", ""),
-            release_date=source.get("release_date", ""),
-            vote_average=source.get("vote_average", 0),
-            popularity=source.get("popularity", 0),
-            genres=source.get("genres", ""),
-            director=source.get("director", ""),
-            cast=source.get("cast", ""),
-            poster_path=source.get("poster_path", ""),
-            tagline=source.get("tagline", ""),
-            runtime=source.get("runtime", 0),
-            imdb_rating=source.get("imdb_rating", 0),
-            score=hit["_score"]
-        ))
-    
-    return movies
+    return _hits_to_movies(result["hits"]["hits"], "semantic")
+
+@SEARCH_SECONDS.time("keyword")
+def keyword_search(
+    query: str,
+    size: int = 10,
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
+    es: Elasticsearch = es_client
+) -> List[Movie]:
+    """
+    Search for movies using keyword matching
+    
+    Only the requested `fields` are fetched from Elasticsearch.
+    """
+    # Execute search
+    with stage("es", "keyword"), es_call("search"):
+        result = es.search(
+            index=settings.INDEX_NAME,
+            body=build_keyword_query(query, size, filters, fields)
+        )
+    _annotate_result(result)
+    
+    # Process results
+    return _hits_to_movies(result["hits"]["hits"], "keyword")
+
+def retrieve_hybrid_candidates(
+    query: str,
+    retrieve_size: int = 100,
+    filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
+    es: Elasticsearch = es_client
+) -> List[Dict[str, Any]]:
+    """
+    Retrieve BM25 candidates with normalized BM25 (0-1) and vector (0-1) scores,
+    in BM25 order. The scores can be re-fused with any weights without
+    another round-trip to Elasticsearch. With `fields`, the sources only
+    hold those fields (plus id and the embedding used for scoring).
+    """
+    # Step 1: Get embedding for semantic search
+    with stage("embed", "hybrid"):
+        vector = get_embedding(query)
+    
+    # Steps 2-3: Execute BM25 search to get initial results
+    with stage("es", "hybrid"), es_call("search"):
+        result = es.search(
+            index=settings.INDEX_NAME,
+            body=build_hybrid_query(query, retrieve_size, filters, fields)
+        )
+    _annotate_result(result)
+    
+    # Step 4: Score candidates using vector similarity
+    return _score_candidates(result["hits"]["hits"], vector, "hybrid")
 
+@SEARCH_SECONDS.time("hybrid")
 def hybrid_search(
     query: str,
     size: int = 10,
     bm25_multiplier: float = 0.5,
     vector_multiplier: float = 0.5,
     filters: Optional[Dict[str, Any]] = None,
+    fields: Optional[List[str]] = None,
     es: Elasticsearch = es_client
 ) -> List[Movie]:
     """
     Hybrid search combining keyword (BM25) and semantic (vector) search
     with re-ranking based on combined scores
     """
-    # Step 1: Get embedding for semantic search
-    vector = get_embedding(query)
+    # Steps 1-4: Retrieve more results than needed for re-ranking
+    candidates = retrieve_hybrid_candidates(
+        query,
+        retrieve_size=min(size * 3, 100),
+        filters=filters,
+        fields=fields,
+        es=es
+    )
     
-    # Step 2: Define BM25 query (retrieve more results than needed for re-ranking)
-    retrieve_size = min(size * 3, 100)  # Get more results to re-rank
+    # Steps 5-6: Combine scores with weights, sort and convert the top results
+    return _fuse_candidates(candidates, size, bm25_multiplier, vector_multiplier, "hybrid")
+
+@SEARCH_SECONDS.time("batch")
+def batch_search(searches: List[Dict[str, Any]], es: Elasticsearch = es_client) -> List[Dict[str, Any]]:
+    """
+    Run many searches with one batched query encoding and a single _msearch
     
-    keyword_query = {
-        "bool": {
-            "must": [{
-                "multi_match": {
-                    "query": query,
-                    "fields": ["title^3", "overview^2", "genres", "tagline", "director", "cast", "production_countries^2", "spoken_languages^2"],
-                    "fuzziness": "AUTO"
-                }
-            }]
-        }
-    }
+    Args:
+        searches: One dictionary per search with "query" and "mode"
+            ("semantic", "keyword" or "hybrid"), and optionally "size",
+            "min_score", "filters", "weights", "fields" and "facets"
     
-    # Apply filters if provided
-    if filters:
-        filter_clauses = []
-        for field, value in filters.items():
-            if field == "genres" and isinstance(value, list):
-                # Special handling for genres list - create AND LOGIC
-                genre_terms = []
-                for genre in value:
-                    # Match genres that contain any of the requested genres
-                    genre_terms.append({"match_phrase": {"genres": genre}})
-                
-                if genre_terms:
-                    filter_clauses.append({
-                        "bool": {
-                            "must": genre_terms
-                            # "minimum_should_match": 1
-                        }
-                    })
-            elif isinstance(value, list):
-                filter_clauses.append({"terms": {field: value}})
-            elif isinstance(value, dict) and ("min" in value or "max" in value):
-                range_filter = {"range": {field: {}}}
-                if "min" in value:
-                    range_filter["range"][field]["gte"] = value["min"]
-                if "max" in value:
-                    range_filter["range"][field]["lte"] = value["max"]
-                filter_clauses.append(range_filter)
+    Returns:
+        One {"results": [...], "facets": ..., "error": ...} dictionary per
+        search, in order; a failed search has an error message and no results
+    """
+    if not searches:
+        return []
+    
+    # Encode every distinct query text that needs a vector in one batch
+    texts = list(dict.fromkeys(s["query"] for s in searches if s.get("mode", "hybrid") != "keyword"))
+    vectors = {}
+    if texts:
+        with stage("embed", "batch"):
+            vectors = dict(zip(texts, get_embeddings(texts)))
+    
+    # One header/body pair per search
+    bodies = []
+    for search in searches:
+        mode = search.get("mode", "hybrid")
+        size = search.get("size") or 10
+        if mode == "semantic":
+            body = build_semantic_query(
+                vectors[search["query"]],
+                size,
+                search.get("min_score") or 0.0,
+                search.get("filters"),
+                search.get("fields")
+            )
+        elif mode == "keyword":
+            body = build_keyword_query(search["query"], size, search.get("filters"), search.get("fields"))
+        else:
+            body = build_hybrid_query(search["query"], min(size * 3, 100), search.get("filters"), search.get("fields"))
+        if search.get("facets"):
+            body["aggs"] = build_facet_aggs()
+        bodies.extend([{"index": settings.INDEX_NAME}, body])
+    
+    with stage("es", "batch"), es_call("msearch"):
+        result = es.msearch(searches=bodies)
+    annotate("es_took_ms", result["took"])
+    
+    results = []
+    for search, response in zip(searches, result["responses"]):
+        if "error" in response:
+            error = response["error"]
+            reason = error.get("reason", str(error)) if isinstance(error, dict) else str(error)
+            results.append({"results": [], "facets": None, "error": reason})
+            continue
+        
+        annotate("es_hits", len(response["hits"]["hits"]))
+        mode = search.get("mode", "hybrid")
+        if mode == "hybrid":
+            weights = search.get("weights") or {}
+            candidates = _score_candidates(response["hits"]["hits"], vectors[search["query"]], "batch")
+            movies = _fuse_candidates(
+                candidates,
+                search.get("size") or 10,
+                weights.get("bm25", 0.5),
+                weights.get("vector", 0.5),
+                "batch"
+            )
+        else:
+            movies = _hits_to_movies(response["hits"]["hits"], "batch")
+        facets = parse_facets(response["aggregations"]) if "aggregations" in response else None
+        results.append({"results": movies, "facets": facets, "error": None})
+    
+    return results
+
+def faceted_search(
+    mode: str,
+    query: str,
+    size: int = 10,
+    min_score: float = 0.0,
+    filters: Optional[Dict[str, Any]] = None,
+    weights: Optional[Dict[str, float]] = None,
+    fields: Optional[List[str]] = None,
+    es: Elasticsearch = es_client
+) -> Tuple[List[Movie], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Search results and their facet counts from a single Elasticsearch request
+    
+    The facets count every document matching the search, not only the
+    returned results: the BM25 matches for keyword and hybrid searches, and
+    the filtered catalog for semantic searches.
+    
+    Args:
+        mode: "semantic", "keyword" or "hybrid"
+    
+    Returns:
+        The movies and the genre, decade and rating facets
+    """
+    weights = weights or {}
+    
+    with SEARCH_SECONDS.time(f"{mode}_facets"):
+        if mode == "keyword":
+            body = build_keyword_query(query, size, filters, fields)
+        else:
+            with stage("embed", mode):
+                vector = get_embedding(query)
+            if mode == "semantic":
+                body = build_semantic_query(vector, size, min_score, filters, fields)
             else:
-                filter_clauses.append({"term": {field: value}})
+                body = build_hybrid_query(query, min(size * 3, 100), filters, fields)
+        body["aggs"] = build_facet_aggs()
         
-        keyword_query["bool"]["filter"] = filter_clauses
-    
-    # Step 3: Execute BM25 search to get initial results
-    result = es.search(
-        index=settings.INDEX_NAME,
-        body={
-            "size": retrieve_size,
-            "query": keyword_query,
-            "_source": True  # Include the complete document
-        }
-    )
-    # print(result)
-    # print("Ini adalah hasil bm25 esearch")
+        with stage("es", mode), es_call("search"):
+            result = es.search(index=settings.INDEX_NAME, body=body)
+        _annotate_result(result)
+        
+        hits = result["hits"]["hits"]
+        if mode == "hybrid":
+            candidates = _score_candidates(hits, vector, mode)
+            movies = _fuse_candidates(candidates, size, weights.get("bm25", 0.5), weights.get("vector", 0.5), mode)
+        else:
+            movies = _hits_to_movies(hits, mode)
+        
+        return movies, parse_facets(result["aggregations"])
+
+def get_global_facets(es: Elasticsearch = es_client) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Facets of the whole catalog, cached in this process
     
-    # Step 4: Re-rank results using vector similarity
-    hits = result["hits"]["hits"]
-    reranked_results = []
+    Every FACETS_CACHE_TTL_SECONDS the cache reads the index generation
+    stamped by mark_indexed (a mapping lookup) and only re-runs the
+    aggregations after a reindex.
+    """
+    global _global_facets
     
-    # Calculate max BM25 score for normalization
-    max_bm25_score = max([hit["_score"] for hit in hits]) if hits else 1.0
+    entry = _global_facets
+    now = time.monotonic()
+    if entry is not None and entry[0] > now:
+        CACHE_HITS.inc("facets")
+        return entry[2]
     
-    for hit in hits:
-        source = hit["_source"]
-        bm25_score = hit["_score"] / max_bm25_score  # Normalize BM25 score (0-1 range)
+    try:
+        with es_call("get_mapping"):
+            generation = get_index_generation(es)
+    except Exception:
+        generation = None
+    
+    revalidate_at = now + settings.FACETS_CACHE_TTL_SECONDS
+    if entry is not None and generation is not None and entry[1] == generation:
+        CACHE_HITS.inc("facets")
+        facets = entry[2]
+    else:
+        CACHE_MISSES.inc("facets")
+        with stage("es", "facets"), es_call("search"):
+            result = es.search(index=settings.INDEX_NAME, body={"size": 0, "aggs": build_facet_aggs()})
+        annotate("es_took_ms", result["took"])
+        facets = parse_facets(result["aggregations"])
+    
+    with _global_facets_lock:
+        _global_facets = (revalidate_at, generation, facets)
+    return facets
+
+class InvalidCursorError(ValueError):
+    """Raised for a malformed or expired cursor, or one used with a different query"""
+
+def _request_fingerprint(mode: str, query: str, params: Dict[str, Any]) -> str:
+    """Short hash binding a cursor to the search it was issued for"""
+    canonical = json.dumps([mode, query, params], sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str, fingerprint: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidCursorError("Malformed cursor")
+    if not isinstance(state, dict) or state.get("fp") != fingerprint:
+        raise InvalidCursorError("Cursor does not belong to this search")
+    return state
+
+def _store_hybrid_page_cache(movies: List[Movie]) -> str:
+    key = uuid.uuid4().hex
+    now = time.monotonic()
+    with _hybrid_page_cache_lock:
+        _hybrid_page_cache[key] = (now + settings.SEARCH_CURSOR_TTL_SECONDS, movies)
+        # Drop expired entries from the oldest end, then enforce the size bound
+        while _hybrid_page_cache and next(iter(_hybrid_page_cache.values()))[0] < now:
+            _hybrid_page_cache.popitem(last=False)
+        while len(_hybrid_page_cache) > settings.HYBRID_CURSOR_CACHE_SIZE:
+            _hybrid_page_cache.popitem(last=False)
+    return key
+
+def _hybrid_page(
+    query: str,
+    size: int,
+    state: Optional[Dict[str, Any]],
+    fingerprint: str,
+    bm25_multiplier: float,
+    vector_multiplier: float,
+    filters: Optional[Dict[str, Any]],
+    fields: Optional[List[str]],
+    es: Elasticsearch
+) -> Tuple[List[Movie], Optional[str]]:
+    """Serve hybrid pages from a cached fused candidate list"""
+    if state is None:
+        # Retrieve and fuse a deep candidate pool once; later pages are slices
+        candidates = retrieve_hybrid_candidates(
+            query,
+            retrieve_size=settings.HYBRID_CURSOR_CANDIDATES,
+            filters=filters,
+            fields=fields,
+            es=es
+        )
+        movies = _fuse_candidates(candidates, len(candidates), bm25_multiplier, vector_multiplier, "hybrid")
+        if len(movies) <= size:
+            return movies, None
+        key = _store_hybrid_page_cache(movies)
+        return movies[:size], _encode_cursor({"fp": fingerprint, "key": key, "offset": size})
+    
+    with _hybrid_page_cache_lock:
+        entry = _hybrid_page_cache.get(state.get("key"))
+    if entry is None or entry[0] < time.monotonic():
+        raise InvalidCursorError("Cursor expired")
+    
+    movies = entry[1]
+    offset = int(state.get("offset", 0))
+    page = movies[offset:offset + size]
+    if offset + size >= len(movies):
+        with _hybrid_page_cache_lock:
+            _hybrid_page_cache.pop(state["key"], None)
+        return page, None
+    return page, _encode_cursor({"fp": fingerprint, "key": state["key"], "offset": offset + size})
+
+def _close_point_in_time(pit_id: str, es: Elasticsearch) -> None:
+    """Release a point-in-time; failures only leave it to expire"""
+    try:
+        with es_call("close_point_in_time"):
+            es.close_point_in_time(id=pit_id)
+    except Exception:
+        pass
+
+def paged_search(
+    mode: str,
+    query: str,
+    size: int = 10,
+    cursor: Optional[str] = None,
+    min_score: float = 0.0,
+    filters: Optional[Dict[str, Any]] = None,
+    weights: Optional[Dict[str, float]] = None,
+    fields: Optional[List[str]] = None,
+    es: Elasticsearch = es_client
+) -> Tuple[List[Movie], Optional[str]]:
+    """
+    One page of search results and the cursor of the next page
+    
+    Keyword and semantic pages are read from a point-in-time with
+    search_after, so every page sees the same index snapshot. Hybrid
+    retrieves HYBRID_CURSOR_CANDIDATES candidates on the first page and keeps
+    the fused list in this process for SEARCH_CURSOR_TTL_SECONDS.
+    
+    Args:
+        mode: "semantic", "keyword" or "hybrid"
+        cursor: Cursor returned with the previous page (None for the first page)
+    
+    Returns:
+        The movies of this page and the next cursor (None on the last page)
+    
+    Raises:
+        InvalidCursorError: If the cursor is malformed, expired or was
+            issued for a different search
+    """
+    weights = weights or {}
+    fingerprint = _request_fingerprint(mode, query, {
+        "min_score": min_score if mode == "semantic" else None,
+        "filters": filters,
+        "weights": weights if mode == "hybrid" else None,
+        "fields": fields
+    })
+    state = _decode_cursor(cursor, fingerprint) if cursor else None
+    
+    with SEARCH_SECONDS.time(f"{mode}_page"):
+        if mode == "hybrid":
+            return _hybrid_page(
+                query,
+                size,
+                state,
+                fingerprint,
+                weights.get("bm25", 0.5),
+                weights.get("vector", 0.5),
+                filters,
+                fields,
+                es
+            )
         
-        # Get document embedding and calculate cosine similarity
-        doc_embedding = source.get("embedding", [])
-        if doc_embedding:
-            # Calculate cosine similarity manually since we're outside ES query
-            similarity = cosine_similarity_manual(vector, doc_embedding)
-            
-            # Combine scores with weights
-            combined_score = (bm25_score * bm25_multiplier) + (similarity * vector_multiplier)
-            
-            reranked_results.append({
-                "source": source,
-                "bm25_score": bm25_score,
-                "vector_score": similarity,
-                "combined_score": combined_score
-            })
-    
-    # Step 5: Sort by combined score and take top results
-    reranked_results.sort(key=lambda x: x["combined_score"], reverse=True)
-    top_results = reranked_results[:size]
-    
-    # Step 6: Convert to Movie objects
-    movies = []
-    for result in top_results:
-        source = result["source"]
-        movies.append(Movie(
-            id=str(source.get("id", "")),
-            title=source.get("title", ""),
-            overview=source.get("overview", ""),
-            release_date=source.get("release_date", ""),
-            vote_average=source.get("vote_average", 0),
-            popularity=source.get("popularity", 0),
-            genres=source.get("genres", ""),
-            director=source.get("director", ""),
-            cast=source.get("cast", ""),
-            poster_path=source.get("poster_path", ""),
-            tagline=source.get("tagline", ""),
-            runtime=source.get("runtime", 0),
-            imdb_rating=source.get("imdb_rating", 0),
-            score=result["combined_score"]
-        ))
-    
-    return movies
+        if mode == "semantic":
+            with stage("embed", mode):
+                vector = get_embedding(query)
+            body = build_semantic_query(vector, size, min_score, filters, fields)
+        else:
+            body = build_keyword_query(query, size, filters, fields)
+        
+        keep_alive = f"{settings.SEARCH_CURSOR_TTL_SECONDS}s"
+        if state is None:
+            with stage("es", mode), es_call("open_point_in_time"):
+                pit_id = es.open_point_in_time(index=settings.INDEX_NAME, keep_alive=keep_alive)["id"]
+        else:
+            pit_id = state["pit"]
+            body["search_after"] = state["after"]
+        
+        body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+        body["sort"] = [{"_score": "desc"}, {"_shard_doc": "asc"}]
+        body["track_total_hits"] = False
+        
+        try:
+            with stage("es", mode), es_call("search"):
+                result = es.search(body=body)
+        except NotFoundError:
+            raise InvalidCursorError("Cursor expired")
+        except Exception:
+            # Nobody holds a cursor for a point-in-time opened by this request
+            if state is None:
+                _close_point_in_time(pit_id, es)
+            raise
+        _annotate_result(result)
+        
+        hits = result["hits"]["hits"]
+        movies = _hits_to_movies(hits, mode)
+        pit_id = result.get("pit_id", pit_id)
+        
+        if len(hits) < size:
+            # Last page: release the point-in-time right away
+            _close_point_in_time(pit_id, es)
+            return movies, None
+        
+        return movies, _encode_cursor({"fp": fingerprint, "pit": pit_id, "after": hits[-1]["sort"]})
+
+def _source_filter(fields: Optional[List[str]], *required: str) -> Dict[str, Any]:
+    """
+    Elasticsearch _source filter for a response projection
+    
+    Without a projection everything but the embedding (and the index-only
+    fields) is fetched.
+    """
+    if not fields:
+        return {"excludes": ["embedding", *_INDEX_ONLY_FIELDS]}
+    return {"includes": sorted((set(fields) - {"score"}) | {"id", *required})}
 
 def cosine_similarity_manual(vec1: list, vec2: list) -> float:
     """Calculate cosine similarity between two vectors"""
@@ -345,30 +719,106 @@ def cosine_similarity_manual(vec1: list, vec2: list) -> float:
     # Normalize to 0-1 range (original is -1 to 1)
     return (similarity + 1) / 2
 
+def _source_to_movie(source: Dict[str, Any], score: float) -> Movie:
+    """Convert an Elasticsearch document source to a Movie"""
+    return Movie(
+        id=str(source.get("id", "")),
+        title=source.get("title", ""),
+        overview=source.get("overview", ""),
+        release_date=source.get("release_date", ""),
+        vote_average=source.get("vote_average", 0),
+        popularity=source.get("popularity", 0),
+        genres=source.get("genres", ""),
+        director=source.get("director", ""),
+        cast=source.get("cast", ""),
+        poster_path=source.get("poster_path", ""),
+        tagline=source.get("tagline", ""),
+        runtime=source.get("runtime", 0),
+        imdb_rating=source.get("imdb_rating", 0),
+        score=score
+    )
+
+def get_documents_by_ids(movie_ids: List[str], es: Elasticsearch = es_client) -> List[Dict[str, Any]]:
+    """
+    Get document sources for the given IDs, in the given order
+    
+    Cached documents are served from memory for DOCUMENT_CACHE_TTL_SECONDS;
+    the rest are fetched with a single mget. Unknown IDs are skipped.
+    """
+    documents = {}
+    missing = []
+    now = time.monotonic()
+    
+    with _document_cache_lock:
+        for movie_id in movie_ids:
+            entry = _document_cache.get(movie_id)
+            if entry is not None and entry[0] > now:
+                _document_cache.move_to_end(movie_id)
+                documents[movie_id] = entry[1]
+            elif movie_id not in missing:
+                missing.append(movie_id)
+    
+    CACHE_HITS.inc("documents", amount=len(documents))
+    if missing:
+        CACHE_MISSES.inc("documents", amount=len(missing))
+        with es_call("mget"):
+            result = es.mget(
+                index=settings.INDEX_NAME,
+                ids=missing,
+                _source_excludes=["embedding", *_INDEX_ONLY_FIELDS]
+            )
+        with _document_cache_lock:
+            for doc in result["docs"]:
+                if not doc.get("found"):
+                    continue
+                documents[doc["_id"]] = doc["_source"]
+                _document_cache[doc["_id"]] = (now + settings.DOCUMENT_CACHE_TTL_SECONDS, doc["_source"])
+                _document_cache.move_to_end(doc["_id"])
+            while len(_document_cache) > settings.DOCUMENT_CACHE_SIZE:
+                _document_cache.popitem(last=False)
+    
+    return [documents[movie_id] for movie_id in movie_ids if movie_id in documents]
+
+def clear_document_cache() -> None:
+    """Drop all cached documents, e.g. after reindexing"""
+    with _document_cache_lock:
+        _document_cache.clear()
+
 def get_movie_by_id(movie_id: str, es: Elasticsearch = es_client) -> Optional[Movie]:
     """
     Get a movie by its ID
     """
     try:
-        result = es.get(index=settings.INDEX_NAME, id=movie_id)
-        source = result["_source"]
-        # print(source)
+        documents = get_documents_by_ids([movie_id], es=es)
+        if not documents:
+            return None
         
-        return Movie(
-            id=str(source.get("id", "")),
-            title=source.get("title", ""),
-            overview=source.get("overview", ""),
-            release_date=source.get("release_date", ""),
-            vote_average=source.get("vote_average", 0),
-            popularity=source.get("popularity", 0),
-            genres=source.get("genres", ""),
-            director=source.get("director", ""),
-            cast=source.get("cast", ""),
-            poster_path=source.get("poster_path", ""),
-            tagline=source.get("tagline", ""),
-            runtime=source.get("runtime", 0),
-            imdb_rating=source.get("imdb_rating", 0),
-            score=1.0
-        )
+        return _source_to_movie(documents[0], score=1.0)
     except:
-        return None
\ No newline at end of file
+        return None
+
+
+def get_similar_movies(movie_id: str, size: int = 10, es: Elasticsearch = es_client) -> Optional[List[Movie]]:
+    """
+    Precomputed nearest neighbours of a movie (see app/services/similar.py)
+    
+    The neighbour list is read with a single get of the movie's "similar"
+    field; the neighbours come from the document cache or one mget.
+    
+    Returns:
+        The most similar movies, scored 0-1, or None if the movie does not
+        exist. Empty if its neighbours were never computed.
+    """
+    try:
+        with stage("es", "similar"), es_call("get"):
+            document = es.get(index=settings.INDEX_NAME, id=movie_id, _source_includes=["similar"])
+    except NotFoundError:
+        return None
+    
+    neighbours = (document["_source"].get("similar") or [])[:size]
+    scores = {neighbour["id"]: neighbour["score"] for neighbour in neighbours}
+    
+    with stage("fetch", "similar"):
+        documents = get_documents_by_ids(list(scores), es=es)
+    with stage("hydrate", "similar"):
+        return [_source_to_movie(source, scores.get(str(source.get("id")), 0.0)) for source in documents]
@@ -0,0 +1,117 @@
+import time
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan, bulk
+
+from app.core.config import settings
+from app.db.elasticsearch import es_client
+
+logger = logging.getLogger(__name__)
+
+def top_k_neighbours(
+    embeddings: np.ndarray,
+    k: int,
+    block_size: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k cosine neighbours of every row, excluding the row itself
+    
+    Similarities are computed one block of rows at a time against the whole
+    matrix, so memory stays at block_size x n instead of n x n.
+    
+    Args:
+        embeddings: n x d matrix, one embedding per movie
+        k: Number of neighbours per movie (capped at n - 1)
+        block_size: Rows multiplied per block
+    
+    Returns:
+        n x k neighbour row indices and their cosine similarities, best first
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1.0, norms)
+    
+    n = len(matrix)
+    k = max(0, min(k, n - 1))
+    indices = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+    
+    for start in range(0, n, block_size):
+        block = matrix[start:start + block_size] @ matrix.T
+        rows = np.arange(len(block))
+        block[rows, start + rows] = -np.inf
+        
+        # Unordered top k per row, then sort only those
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+        scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+    
+    return indices, scores
+
+def _load_embeddings(es: Elasticsearch) -> Tuple[List[str], np.ndarray]:
+    """IDs and embeddings of every indexed movie"""
+    ids = []
+    vectors = []
+    for hit in scan(es, index=settings.INDEX_NAME, query={"_source": ["embedding"]}):
+        embedding = hit["_source"].get("embedding")
+        if embedding:
+            ids.append(hit["_id"])
+            vectors.append(embedding)
+    return ids, np.asarray(vectors, dtype=np.float32)
+
+def _neighbour_updates(ids: List[str], indices: np.ndarray, scores: np.ndarray) -> Iterator[Dict[str, Any]]:
+    for row, movie_id in enumerate(ids):
+        yield {
+            "_op_type": "update",
+            "_index": settings.INDEX_NAME,
+            "_id": movie_id,
+            "doc": {
+                "similar": [
+                    # Same 0-1 scale as the vector score of hybrid search
+                    {"id": ids[column], "score": round((float(score) + 1) / 2, 4)}
+                    for column, score in zip(indices[row], scores[row])
+                ]
+            }
+        }
+
+def compute_similar_movies(
+    k: Optional[int] = None,
+    block_size: Optional[int] = None,
+    es: Elasticsearch = es_client
+) -> int:
+    """
+    Precompute the nearest neighbours of every movie from the stored
+    embeddings and write them to each document's "similar" field
+    
+    Args:
+        k: Neighbours per movie (default: SIMILAR_TOP_K)
+        block_size: Rows per matrix multiplication block (default: SIMILAR_BLOCK_SIZE)
+    
+    Returns:
+        Number of movies updated
+    """
+    k = k or settings.SIMILAR_TOP_K
+    block_size = block_size or settings.SIMILAR_BLOCK_SIZE
+    
+    # Make freshly indexed documents visible to the scan
+    es.indices.refresh(index=settings.INDEX_NAME)
+    
+    start = time.perf_counter()
+    ids, embeddings = _load_embeddings(es)
+    logger.info(f"Loaded {len(ids)} embeddings in {time.perf_counter() - start:.1f}s")
+    if not ids:
+        return 0
+    
+    start = time.perf_counter()
+    indices, scores = top_k_neighbours(embeddings, k, block_size)
+    logger.info(f"Computed top-{indices.shape[1]} neighbours in {time.perf_counter() - start:.1f}s")
+    
+    updated, _ = bulk(es, _neighbour_updates(ids, indices, scores), chunk_size=500)
+    return updated
@@ -0,0 +1,100 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+from elasticsearch import Elasticsearch
+from app.core.config import settings
+from app.core.telemetry import SEARCH_SECONDS, CACHE_HITS, CACHE_MISSES, stage, annotate, es_call
+from app.db.elasticsearch import es_client
+from app.db.index import split_list
+
+# Recent typeahead responses: (prefix, size, fuzzy) -> (expiry, response)
+_suggest_cache: "OrderedDict[Tuple[str, int, bool], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_suggest_cache_lock = threading.Lock()
+
+def build_suggest_query(prefix: str, size: int = 5, fuzzy: bool = True) -> Dict[str, Any]:
+    """Elasticsearch request body with completion suggesters for titles and people"""
+    def completion(field: str, **options) -> Dict[str, Any]:
+        body = {"field": field, "size": size, **options}
+        if fuzzy:
+            # At most one edit, never on the first character or prefixes under 3 characters
+            body["fuzzy"] = {"fuzziness": 1, "prefix_length": 1, "min_length": 3}
+        return {"prefix": prefix, "completion": body}
+    
+    return {
+        "size": 0,
+        "_source": ["id", "title", "director", "cast"],
+        "suggest": {
+            "titles": completion("title_suggest"),
+            # A person is entered once per movie; keep only the most popular one.
+            # Extra options make up for names matched from two words.
+            "people": completion("people_suggest", skip_duplicates=True, size=size * 2)
+        }
+    }
+
+def _person_name(text: str, source: Dict[str, Any]) -> str:
+    """Full name of the person whose entry (the name or its tail) matched"""
+    for field in ("director", "cast"):
+        for name in split_list(source.get(field)):
+            if name == text or name.endswith(" " + text):
+                return name
+    return text
+
+def parse_suggestions(result: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """Convert the completion options to {"titles": [...], "people": [...]}"""
+    titles = []
+    for option in result["suggest"]["titles"][0]["options"]:
+        source = option.get("_source", {})
+        titles.append({
+            "id": str(source.get("id", option["_id"])),
+            "title": source.get("title", option["text"]),
+            "text": option["text"]
+        })
+    
+    people = []
+    for option in result["suggest"]["people"][0]["options"]:
+        name = _person_name(option["text"], option.get("_source", {}))
+        if name not in people:
+            people.append(name)
+    
+    return {"titles": titles, "people": people[:size]}
+
+@SEARCH_SECONDS.time("suggest")
+def suggest(prefix: str, size: int = 5, fuzzy: bool = True, es: Elasticsearch = es_client) -> Dict[str, Any]:
+    """
+    Typeahead suggestions for a prefix of a title, original title, director
+    or cast member
+    
+    Answers come from the completion fields written by index_data.py, with
+    recent prefixes served from memory for SUGGEST_CACHE_TTL_SECONDS (which
+    also bounds how long stale suggestions survive a reindex).
+    
+    Args:
+        prefix: Text typed so far
+        size: Maximum number of titles and of people
+        fuzzy: Also match prefixes one typo away
+    
+    Returns:
+        Dictionary with matching titles (id, title, matched text) and people names
+    """
+    key = (" ".join(prefix.lower().split()), size, fuzzy)
+    now = time.monotonic()
+    with _suggest_cache_lock:
+        entry = _suggest_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _suggest_cache.move_to_end(key)
+            CACHE_HITS.inc("suggest")
+            return entry[1]
+    CACHE_MISSES.inc("suggest")
+    
+    with stage("es", "suggest"), es_call("suggest"):
+        result = es.search(index=settings.INDEX_NAME, body=build_suggest_query(key[0], size, fuzzy))
+    annotate("es_took_ms", result["took"])
+    response = parse_suggestions(result, size)
+    
+    with _suggest_cache_lock:
+        _suggest_cache[key] = (now + settings.SUGGEST_CACHE_TTL_SECONDS, response)
+        _suggest_cache.move_to_end(key)
+        while len(_suggest_cache) > settings.SUGGEST_CACHE_SIZE:
+            _suggest_cache.popitem(last=False)
+    return response
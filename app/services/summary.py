@@ -1,10 +1,17 @@
-import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import math
 import os
-import gc
 import logging
-import torch
+import threading
+import time
+from app.core.config import settings
+from app.core.telemetry import CACHE_HITS, CACHE_MISSES, GENERATED_TOKENS, stage, observe_stage, annotate
+from app.services.memory import maybe_reclaim_memory
+from app.services.artifacts import get_artifact_path
 
 logger = logging.getLogger(__name__)
 
@@ -12,66 +19,257 @@ logger = logging.getLogger(__name__)
 os.environ['TRANSFORMERS_CACHE'] = '/app/model_cache'
 os.environ['HF_HOME'] = '/app/model_cache'
 # Lazy loading for model and tokenizer
+SUMMARY_MODEL_NAME = "Qwen/Qwen2.5-0.5B-Instruct"
+
 _model = None
 _tokenizer = None
+_model_lock = threading.Lock()
+
+# How the model was loaded, reported on /health
+load_info: Dict[str, Any] = {}
+
+# Tokenized prompt fragments keyed by (movie id, fragment kind, text hash)
+_fragment_cache: "OrderedDict[Tuple[str, str, int], List[int]]" = OrderedDict()
+_fragment_cache_lock = threading.Lock()
+
+# Fragments shorter than this are not worth including in truncated form
+_MIN_FRAGMENT_TOKENS = 12
+
+# Cast names per movie set aside before overviews share out the budget
+_MIN_CAST_NAMES = 2
+
+# Dedicated generation workers so summaries never run on the event loop
+_generation_pool = ThreadPoolExecutor(
+    max_workers=settings.SUMMARY_WORKERS,
+    thread_name_prefix="summary"
+)
+_admission_lock = threading.Lock()
+_pending_jobs = 0
+_avg_generation_seconds = settings.SUMMARY_INITIAL_ESTIMATE_SECONDS
+
+class SummaryOverloadedError(Exception):
+    """Raised when a summary request is shed instead of being queued"""
+    
+    def __init__(self, detail: str, retry_after: int, status_code: int = 503):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+def load_summary_model_from_hub():
+    """Download (or read from the HF cache) and 4-bit quantize the summary model"""
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+    
+    quantization_config = BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_compute_dtype=torch.float16,
+        bnb_4bit_use_double_quant=True,
+        bnb_4bit_quant_type="nf4"
+    )
+    
+    tokenizer = AutoTokenizer.from_pretrained(
+        SUMMARY_MODEL_NAME,
+        cache_dir='/app/model_cache'
+    )
+    
+    model = AutoModelForCausalLM.from_pretrained(
+        SUMMARY_MODEL_NAME,
+        quantization_config=quantization_config,
+        device_map="auto",
+        torch_dtype=torch.float16,
+        cache_dir='/app/model_cache'
+    )
+    
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    
+    return model, tokenizer
+
+def _load_summary_model_from_artifact(path: str):
+    """Load the already-quantized model and tokenizer saved by the artifact build"""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = AutoModelForCausalLM.from_pretrained(path, device_map="auto")
+    return model, tokenizer
 
 def get_model_and_tokenizer():
+    """
+    Return the summary model and tokenizer, loading them on first use (thread-safe)
+    
+    Pre-serialized artifacts are preferred; the Hugging Face checkpoint is
+    only downloaded and quantized when none were built for this model.
+    """
     global _model, _tokenizer
     
-    if _model is None or _tokenizer is None:
-        model_name = "Qwen/Qwen2.5-0.5B-Instruct"
-        
-        try:
-            quantization_config = BitsAndBytesConfig(
-                load_in_4bit=True,
-                bnb_4bit_compute_dtype=torch.float16,
-                bnb_4bit_use_double_quant=True,
-                bnb_4bit_quant_type="nf4"
-            )
-            
-            _tokenizer = AutoTokenizer.from_pretrained(
-                model_name,
-                cache_dir='/app/model_cache'
-            )
-            
-            _model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                quantization_config=quantization_config,
-                device_map="auto",
-                torch_dtype=torch.float16,
-                cache_dir='/app/model_cache'
-            )
+    if _model is not None and _tokenizer is not None:
+        return _model, _tokenizer
+    
+    with _model_lock:
+        if _model is None or _tokenizer is None:
+            start = time.perf_counter()
+            source = "hub"
             
-            if _tokenizer.pad_token is None:
-                _tokenizer.pad_token = _tokenizer.eos_token
+            try:
+                model = tokenizer = None
+                artifact_path = get_artifact_path("summary", SUMMARY_MODEL_NAME)
+                if artifact_path:
+                    try:
+                        model, tokenizer = _load_summary_model_from_artifact(artifact_path)
+                        source = "artifact"
+                    except Exception as e:
+                        logger.warning(f"Loading summary artifact from {artifact_path} failed, using hub checkpoint: {e}")
+                
+                if model is None:
+                    model, tokenizer = load_summary_model_from_hub()
                 
-        except Exception as e:
-            logger.error(f"Model loading failed: {e}")
-            raise e
+                # Publish both together so readers never see a half-loaded pair
+                _model, _tokenizer = model, tokenizer
+                
+            except Exception as e:
+                logger.error(f"Model loading failed: {e}")
+                raise e
+            
+            load_info.update(source=source, seconds=round(time.perf_counter() - start, 3))
+            logger.info(f"Summary model loaded from {source} in {load_info['seconds']:.2f}s")
     
     return _model, _tokenizer
 
-def format_movie_data(movies: List[Dict[Any, Any]]) -> str:
-    """Format movie data into a readable text for the LLM prompt"""
-    formatted_text = ""
-    
-    for i, movie in enumerate(movies[:5]):  # Limiting to top 5 movies to avoid token limits
-        title = movie.get("title", "Unknown Title")
-        release_date = movie.get("release_date", "Unknown Year")
-        year = release_date.split("-")[0] if release_date and "-" in release_date else "Unknown Year"
-        overview = movie.get("overview", "No overview available")
-        genres = movie.get("genres", "Unknown Genres")
-        vote_average = movie.get("vote_average", "N/A")
-        director = movie.get("director", "Unknown Director")
+def _encode_fragment(tokenizer, movie_id: str, kind: str, text: str) -> List[int]:
+    """Tokenize a prompt fragment, reusing cached token ids for known movies"""
+    if not movie_id:
+        return tokenizer.encode(text, add_special_tokens=False)
+    
+    key = (movie_id, kind, hash(text))
+    with _fragment_cache_lock:
+        token_ids = _fragment_cache.get(key)
+        if token_ids is not None:
+            _fragment_cache.move_to_end(key)
+            CACHE_HITS.inc("prompt_fragments")
+            return token_ids
+    
+    CACHE_MISSES.inc("prompt_fragments")
+    token_ids = tokenizer.encode(text, add_special_tokens=False)
+    
+    with _fragment_cache_lock:
+        _fragment_cache[key] = token_ids
+        while len(_fragment_cache) > settings.SUMMARY_FRAGMENT_CACHE_SIZE:
+            _fragment_cache.popitem(last=False)
+    
+    return token_ids
+
+def _truncate_fragment(tokenizer, token_ids: List[int], limit: int) -> str:
+    """Decode at most `limit` tokens of a fragment, marking the cut"""
+    if len(token_ids) <= limit:
+        return tokenizer.decode(token_ids)
+    return tokenizer.decode(token_ids[:limit]).rstrip() + "...\n"
+
+def build_movie_prompt_data(
+    movies: List[Dict[Any, Any]],
+    tokenizer,
+    token_budget: Optional[int] = None,
+    max_movies: Optional[int] = None
+) -> str:
+    """
+    Format movie data for the LLM prompt within a token budget
+    
+    Fragments are added in priority order: the header (title, year, director,
+    genres, rating) of each movie by rank, then overviews of the top-ranked
+    movies truncated to a fair share of the remaining budget, then a
+    compressed cast list. Room for the first _MIN_CAST_NAMES cast names of
+    each movie is reserved before the overviews, and the rest of the main
+    cast is added as far as the budget allows.
+    
+    Args:
+        movies: List of movie data dictionaries, ordered by rank
+        tokenizer: Tokenizer used by the summary model
+        token_budget: Maximum number of prompt tokens for the movie data
+        max_movies: Maximum number of movies to consider
         
-        formatted_text += f"Movie {i+1}:\n"
-        formatted_text += f"Title: {title} ({year})\n"
-        formatted_text += f"Directed by: {director}\n"
-        formatted_text += f"Genres: {genres}\n"
-        formatted_text += f"Rating: {vote_average}/10\n"
-        formatted_text += f"Overview: {overview}\n\n"
+    Returns:
+        The formatted movie data
+    """
+    if token_budget is None:
+        token_budget = settings.SUMMARY_PROMPT_TOKEN_BUDGET
+    if max_movies is None:
+        max_movies = settings.SUMMARY_MAX_MOVIES
+    
+    entries = []
+    used = 0
     
-    return formatted_text
+    # Pass 1: headers, by rank, until the budget runs out
+    for i, movie in enumerate(movies[:max_movies]):
+        movie_id = str(movie.get("id") or "")
+        release_date = movie.get("release_date") or ""
+        year = release_date.split("-")[0] if release_date else "Unknown Year"
+        
+        header = (
+            f"Title: {movie.get('title') or 'Unknown Title'} ({year})\n"
+            f"Directed by: {movie.get('director') or 'Unknown Director'}\n"
+            f"Genres: {movie.get('genres') or 'Unknown Genres'}\n"
+            f"Rating: {movie.get('vote_average', 'N/A')}/10\n"
+        )
+        label = f"Movie {i+1}:\n"
+        cost = (
+            len(_encode_fragment(tokenizer, "#label", "label", label))
+            + len(_encode_fragment(tokenizer, movie_id, "header", header))
+        )
+        
+        # Always keep at least the top-ranked movie
+        if entries and used + cost > token_budget:
+            break
+        
+        used += cost
+        entries.append({"movie": movie, "movie_id": movie_id, "text": label + header})
+    
+    # Reserve a short cast line per movie, by rank, so long overviews
+    # cannot crowd the cast out entirely
+    reserved = 0
+    for entry in entries:
+        entry["cast_names"] = [name for name in (entry["movie"].get("cast") or "").split(", ") if name]
+        entry["cast_names"] = entry["cast_names"][:settings.SUMMARY_CAST_NAMES]
+        entry["cast_reserve"] = 0
+        if not entry["cast_names"]:
+            continue
+        
+        short_cast = "Starring: " + ", ".join(entry["cast_names"][:_MIN_CAST_NAMES]) + "\n"
+        cost = len(_encode_fragment(tokenizer, entry["movie_id"], "cast", short_cast))
+        if used + reserved + cost <= token_budget:
+            entry["cast_reserve"] = cost
+            reserved += cost
+    
+    # Pass 2: overviews by rank, each truncated to its share of what is left.
+    # Only the top-ranked movies that can each get a useful share take part,
+    # so a tight budget never skips a higher-ranked overview for a lower one.
+    overview_budget = token_budget - reserved
+    with_overview = [entry for entry in entries if entry["movie"].get("overview")]
+    with_overview = with_overview[:max(0, (overview_budget - used) // _MIN_FRAGMENT_TOKENS)]
+    for position, entry in enumerate(with_overview):
+        share = (overview_budget - used) // (len(with_overview) - position)
+        if share < _MIN_FRAGMENT_TOKENS:
+            break
+        
+        overview = entry["movie"]["overview"]
+        token_ids = _encode_fragment(tokenizer, entry["movie_id"], "overview", f"Overview: {overview}\n")
+        limit = min(len(token_ids), share)
+        
+        entry["text"] += _truncate_fragment(tokenizer, token_ids, limit)
+        used += limit
+    
+    # Pass 3: main cast by rank, dropping trailing names until the line fits
+    # into what is left plus this movie's reservation
+    for entry in entries:
+        reserved -= entry["cast_reserve"]
+        for count in range(len(entry["cast_names"]), 0, -1):
+            cast_line = "Starring: " + ", ".join(entry["cast_names"][:count]) + "\n"
+            cost = len(_encode_fragment(tokenizer, entry["movie_id"], "cast", cast_line))
+            if used + reserved + cost <= token_budget:
+                entry["text"] += cast_line
+                used += cost
+                break
+    
+    return "\n".join(entry["text"] for entry in entries)
 
 def create_movie_summary(movies: List[Dict[Any, Any]], query: str = "") -> str:
     """
@@ -90,8 +288,10 @@ def create_movie_summary(movies: List[Dict[Any, Any]], query: str = "") -> str:
     # Get the model and tokenizer
     model, tokenizer = get_model_and_tokenizer()
     
-    # Format movie data for the prompt
-    formatted_movies = format_movie_data(movies)
+    prompt_start = time.perf_counter()
+    
+    # Format movie data for the prompt within the token budget
+    formatted_movies = build_movie_prompt_data(movies, tokenizer)
     
     # Create the prompt for the LLM
     system_prompt = (
@@ -133,8 +333,11 @@ def create_movie_summary(movies: List[Dict[Any, Any]], query: str = "") -> str:
     
     # Tokenize and generate
     model_inputs = tokenizer([text], return_tensors="pt").to(model.device)
+    observe_stage("prompt", "summary", time.perf_counter() - prompt_start)
+    
+    import torch
     
-    with torch.no_grad():  # No need to track gradients for inference
+    with stage("generate", "summary"), torch.no_grad():  # No need to track gradients for inference
         generated_ids = model.generate(
             **model_inputs,
             max_new_tokens=250,  # Limit the summary length
@@ -147,18 +350,173 @@ def create_movie_summary(movies: List[Dict[Any, Any]], query: str = "") -> str:
     generated_ids = [
         output_ids[len(input_ids):] for input_ids, output_ids in zip(model_inputs.input_ids, generated_ids)
     ]
+    new_tokens = sum(len(ids) for ids in generated_ids)
+    GENERATED_TOKENS.inc(amount=new_tokens)
+    annotate("prompt_tokens", model_inputs.input_ids.shape[-1])
+    annotate("generated_tokens", new_tokens)
     
     # Decode the response
     response = tokenizer.batch_decode(generated_ids, skip_special_tokens=True)[0]
     
-    # GPU memory cleanup
+    # Release the tensors; memory is only reclaimed above the high-water mark
     del model_inputs, generated_ids
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-        torch.cuda.synchronize()
-    gc.collect()
+    maybe_reclaim_memory()
+    
+    # Clean up any trailing/leading whitespace
+    return response.strip()
+
+def create_fallback_summary(movies: List[Dict[Any, Any]], query: str = "") -> str:
+    """
+    Build a deterministic Markdown overview from structured movie fields
+    
+    Used when the LLM is cold, overloaded or cannot answer within the
+    requested latency budget.
+    """
+    if not movies:
+        return "No movies provided for summarization."
+    
+    genre_counts = Counter()
+    director_counts = Counter()
+    years = []
+    top_movie = None
+    
+    for movie in movies:
+        for genre in (movie.get("genres") or "").split(","):
+            if genre.strip():
+                genre_counts[genre.strip()] += 1
+        for director in (movie.get("director") or "").split(","):
+            if director.strip():
+                director_counts[director.strip()] += 1
+        
+        year = (movie.get("release_date") or "")[:4]
+        if year.isdigit():
+            years.append(int(year))
+        
+        if movie.get("vote_average") and (top_movie is None or movie["vote_average"] > top_movie["vote_average"]):
+            top_movie = movie
+    
+    heading = f"### Movies for \"{query}\"" if query else "### Movie Overview"
+    lines = [heading, ""]
+    
+    span = ""
+    if years:
+        span = f", released {min(years)}" if min(years) == max(years) else f", released {min(years)}-{max(years)}"
+    lines.append(f"{len(movies)} movie{'s' if len(movies) != 1 else ''}{span}.")
+    lines.append("")
+    
+    if genre_counts:
+        genres = ", ".join(f"{genre} ({count})" for genre, count in genre_counts.most_common(3))
+        lines.append(f"- **Dominant genres:** {genres}")
+    if director_counts:
+        directors = ", ".join(director for director, _ in director_counts.most_common(3))
+        lines.append(f"- **Directors:** {directors}")
+    if top_movie is not None:
+        top_year = (top_movie.get("release_date") or "")[:4]
+        top_title = top_movie.get("title") or "Unknown Title"
+        if top_year.isdigit():
+            top_title += f" ({top_year})"
+        lines.append(f"- **Top rated:** *{top_title}* - {top_movie['vote_average']}/10")
+    
+    return "\n".join(lines).strip()
 
-    logger.debug("GPU memory cleaned")
+def estimated_wait_seconds(pending_jobs: Optional[int] = None) -> float:
+    """Estimate how long a newly admitted summary job would take to finish"""
+    if pending_jobs is None:
+        pending_jobs = _pending_jobs
+    rounds = pending_jobs // settings.SUMMARY_WORKERS + 1
+    return rounds * _avg_generation_seconds
 
-    # Clean up any trailing/leading whitespace
-    return response.strip()
\ No newline at end of file
+def _run_generation_job(movies: List[Dict[Any, Any]], query: str, submitted: float) -> str:
+    """Run one summary on a pool worker and update the timing estimate"""
+    global _avg_generation_seconds
+    
+    start = time.perf_counter()
+    observe_stage("queue", "summary", start - submitted)
+    summary = create_movie_summary(movies, query)
+    elapsed = time.perf_counter() - start
+    
+    with _admission_lock:
+        _avg_generation_seconds = 0.8 * _avg_generation_seconds + 0.2 * elapsed
+    
+    return summary
+
+def _release_job(_future) -> None:
+    global _pending_jobs
+    with _admission_lock:
+        _pending_jobs -= 1
+
+async def submit_movie_summary(
+    movies: List[Dict[Any, Any]],
+    query: str = "",
+    max_latency_ms: Optional[int] = None
+) -> Tuple[str, str]:
+    """
+    Queue a summary on the bounded generation pool
+    
+    Args:
+        movies: List of movie data dictionaries
+        query: The original search query (optional)
+        max_latency_ms: Latency budget; when set, the extractive fallback
+            answers whenever the LLM is cold, overloaded or too slow
+    
+    Returns:
+        The summary and the path that produced it ("llm" or "fallback")
+    
+    Raises:
+        SummaryOverloadedError: 429 when the queue is full, 503 when the
+            estimated wait exceeds SUMMARY_MAX_WAIT_SECONDS (only without
+            a latency budget)
+    """
+    global _pending_jobs
+    
+    budget = max_latency_ms / 1000 if max_latency_ms is not None else None
+    
+    if budget is not None and (_model is None or _tokenizer is None):
+        return create_fallback_summary(movies, query), "fallback"
+    
+    with _admission_lock:
+        wait = estimated_wait_seconds(_pending_jobs)
+        
+        if budget is not None and wait > budget:
+            return create_fallback_summary(movies, query), "fallback"
+        
+        if _pending_jobs >= settings.SUMMARY_WORKERS + settings.SUMMARY_QUEUE_DEPTH:
+            if budget is not None:
+                return create_fallback_summary(movies, query), "fallback"
+            raise SummaryOverloadedError(
+                "Summary queue is full",
+                retry_after=max(1, math.ceil(_avg_generation_seconds)),
+                status_code=429
+            )
+        
+        if wait > settings.SUMMARY_MAX_WAIT_SECONDS:
+            if budget is not None:
+                return create_fallback_summary(movies, query), "fallback"
+            raise SummaryOverloadedError(
+                f"Estimated wait of {wait:.1f}s exceeds the summary deadline",
+                retry_after=max(1, math.ceil(wait - settings.SUMMARY_MAX_WAIT_SECONDS)),
+                status_code=503
+            )
+        
+        _pending_jobs += 1
+    
+    # The slot is released when the job finishes, even if the client has gone.
+    # The job runs in a copy of this context so its stages reach the request trace
+    future = _generation_pool.submit(
+        contextvars.copy_context().run,
+        _run_generation_job,
+        movies,
+        query,
+        time.perf_counter()
+    )
+    future.add_done_callback(_release_job)
+    
+    if budget is None:
+        return await asyncio.wrap_future(future), "llm"
+    
+    try:
+        summary = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=budget)
+        return summary, "llm"
+    except asyncio.TimeoutError:
+        # The generation keeps running and still feeds the timing estimate
+        return create_fallback_summary(movies, query), "fallback"
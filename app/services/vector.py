@@ -1,12 +1,131 @@
-from sentence_transformers import SentenceTransformer
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.config import settings
+from app.services.artifacts import get_artifact_entry, get_artifact_path
 
-# Initialize the model
-model = SentenceTransformer(settings.VECTOR_MODEL_NAME)
+logger = logging.getLogger(__name__)
+
+# Lazy loading for the embedding model
+_model = None
+_model_lock = threading.Lock()
+
+# How the model was loaded, reported on /health
+load_info: Dict[str, Any] = {}
+
+def load_embedding_model(backend: Optional[str] = None) -> Tuple[Any, str]:
+    """
+    Construct an embedding model for the given backend ("torch" or "onnx")
+    
+    Pre-serialized artifacts are preferred over the Hugging Face checkpoint.
+    For ONNX, the graph-optimized or int8-quantized file recorded by the
+    artifact build is used; without one the model is exported on the fly
+    and checked against the PyTorch model on the evaluation queries. An
+    ONNX model whose parity check failed (recorded or on the fly) is not
+    served: the PyTorch model is used instead and the source is
+    "torch_fallback".
+    
+    Returns:
+        The model and where it was loaded from
+    """
+    # Imported here so that importing this module stays cheap
+    from sentence_transformers import SentenceTransformer
+    
+    backend = backend or settings.EMBEDDING_BACKEND
+    
+    artifact_path = get_artifact_path("embedding", settings.VECTOR_MODEL_NAME)
+    torch_source = "artifact" if artifact_path else "hub"
+    if backend != "onnx":
+        return SentenceTransformer(artifact_path or settings.VECTOR_MODEL_NAME), torch_source
+    
+    torch_model = None
+    entry = get_artifact_entry("embedding_onnx", settings.VECTOR_MODEL_NAME)
+    if entry:
+        parity = entry.get("parity") or {}
+        if parity.get("passed"):
+            model = SentenceTransformer(entry["path"], backend="onnx", model_kwargs={"file_name": entry["file_name"]})
+            return model, "artifact"
+        description = "ONNX embedding artifact"
+    else:
+        # An on-the-fly export has no recorded parity check, so run one now
+        from app.evaluation.queries import llm_evaluation_queries
+        
+        model = SentenceTransformer(settings.VECTOR_MODEL_NAME, backend="onnx")
+        torch_model = SentenceTransformer(artifact_path or settings.VECTOR_MODEL_NAME)
+        parity = check_embedding_parity(torch_model, model, [q["query"] for q in llm_evaluation_queries])
+        if parity["passed"]:
+            return model, "hub"
+        description = "ONNX export of the hub checkpoint"
+    
+    logger.error(
+        f"{description} has no passing parity check (min cosine {parity.get('min_cosine', 'n/a')}, "
+        f"threshold {parity.get('threshold', settings.EMBEDDING_PARITY_THRESHOLD)}); falling back to the PyTorch model"
+    )
+    if torch_model is None:
+        torch_model = SentenceTransformer(artifact_path or settings.VECTOR_MODEL_NAME)
+    return torch_model, "torch_fallback"
+
+def get_embedding_model():
+    """Return the embedding model, loading it on first use (thread-safe)"""
+    global _model
+    
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                start = time.perf_counter()
+                model, source = load_embedding_model()
+                _model = model
+                
+                load_info.update(
+                    backend=settings.EMBEDDING_BACKEND,
+                    source=source,
+                    seconds=round(time.perf_counter() - start, 3)
+                )
+                logger.info(f"Embedding model ({settings.EMBEDDING_BACKEND}) loaded from {source} in {load_info['seconds']:.2f}s")
+    
+    return _model
+
+def check_embedding_parity(
+    reference,
+    candidate,
+    texts: List[str],
+    threshold: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Compare two embedding models on the same texts by cosine similarity
+    
+    Returns:
+        Minimum and mean cosine agreement, and whether the minimum reaches
+        the threshold (EMBEDDING_PARITY_THRESHOLD by default)
+    """
+    import numpy as np
+    
+    if threshold is None:
+        threshold = settings.EMBEDDING_PARITY_THRESHOLD
+    
+    a = np.asarray(reference.encode(texts, normalize_embeddings=True))
+    b = np.asarray(candidate.encode(texts, normalize_embeddings=True))
+    cosines = (a * b).sum(axis=1)
+    
+    return {
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+        "threshold": threshold,
+        "passed": bool(cosines.min() >= threshold)
+    }
+
+def warmup_embedding_model() -> None:
+    """Load the embedding model and run one encode so the first query is not slow"""
+    get_embedding_model().encode("warmup")
 
 def get_embedding(text: str) -> list:
     """Generate embedding vector for a text"""
-    return model.encode(text).tolist()
+    return get_embedding_model().encode(text).tolist()
+
+def get_embeddings(texts: List[str]) -> List[list]:
+    """Generate embedding vectors for many texts in one batched encode"""
+    return get_embedding_model().encode(texts).tolist()
 
 def create_semantic_text(doc: dict) -> str:
     """Create a rich semantic text representation from a document using all attributes"""
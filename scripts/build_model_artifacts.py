@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+
+# Add the project root to the path so we can import app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.config import settings
+from app.services.artifacts import record_artifact
+
+def build_summary_artifact(output_dir: str) -> None:
+    """Quantize the summary model once and save it with its tokenizer as safetensors"""
+    from app.services.summary import load_summary_model_from_hub, SUMMARY_MODEL_NAME
+    
+    start = time.time()
+    model, tokenizer = load_summary_model_from_hub()
+    
+    path = os.path.join(output_dir, "summary")
+    model.save_pretrained(path, safe_serialization=True)
+    tokenizer.save_pretrained(path)
+    
+    record_artifact("summary", SUMMARY_MODEL_NAME, output_dir, quantization="nf4")
+    print(f"Saved summary model to {path} in {time.time() - start:.2f} seconds")
+
+def build_embedding_artifact(output_dir: str) -> None:
+    """Save the embedding model as safetensors"""
+    from sentence_transformers import SentenceTransformer
+    
+    start = time.time()
+    model = SentenceTransformer(settings.VECTOR_MODEL_NAME)
+    
+    path = os.path.join(output_dir, "embedding")
+    model.save(path, safe_serialization=True)
+    
+    record_artifact("embedding", settings.VECTOR_MODEL_NAME, output_dir)
+    print(f"Saved embedding model to {path} in {time.time() - start:.2f} seconds")
+
+def build_embedding_onnx_artifact(output_dir: str, optimization: str = "O3", quantization: str = "avx2") -> None:
+    """
+    Export the embedding model to ONNX, graph-optimize or int8-quantize it,
+    and record whether it agrees with the PyTorch embeddings
+    """
+    from sentence_transformers import (
+        SentenceTransformer,
+        export_optimized_onnx_model,
+        export_dynamic_quantized_onnx_model
+    )
+    from app.services.vector import check_embedding_parity
+    from app.evaluation.queries import llm_evaluation_queries
+    
+    start = time.time()
+    path = os.path.join(output_dir, "embedding_onnx")
+    model = SentenceTransformer(settings.VECTOR_MODEL_NAME, backend="onnx")
+    model.save(path)
+    
+    if quantization != "none":
+        export_dynamic_quantized_onnx_model(model, quantization, path)
+        file_name = f"onnx/model_qint8_{quantization}.onnx"
+    else:
+        export_optimized_onnx_model(model, optimization, path)
+        file_name = f"onnx/model_{optimization}.onnx"
+    
+    exported = SentenceTransformer(path, backend="onnx", model_kwargs={"file_name": file_name})
+    reference = SentenceTransformer(settings.VECTOR_MODEL_NAME)
+    parity = check_embedding_parity(reference, exported, [q["query"] for q in llm_evaluation_queries])
+    
+    record_artifact("embedding_onnx", settings.VECTOR_MODEL_NAME, output_dir, file_name=file_name, parity=parity)
+    print(f"Saved ONNX embedding model to {os.path.join(path, file_name)} in {time.time() - start:.2f} seconds")
+    print(f"Parity with PyTorch: min cosine {parity['min_cosine']:.4f}, mean {parity['mean_cosine']:.4f}")
+    if not parity["passed"]:
+        print(f"WARNING: min cosine is below the threshold of {parity['threshold']}; the server will not load this artifact and falls back to PyTorch")
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build pre-serialized model artifacts for fast cold start")
+    parser.add_argument("--output", default=settings.MODEL_ARTIFACTS_DIR, help="Artifact directory")
+    parser.add_argument("--skip-summary", action="store_true", help="Do not build the summary model")
+    parser.add_argument("--skip-embedding", action="store_true", help="Do not build the embedding model")
+    parser.add_argument("--onnx", action="store_true", help="Also export the ONNX embedding model")
+    parser.add_argument("--onnx-optimization", default="O3", help="ONNX graph optimization level (O1-O4), used without quantization")
+    parser.add_argument("--onnx-quantization", default="avx2", help="int8 quantization target (arm64, avx2, avx512, avx512_vnni) or 'none'")
+    
+    args = parser.parse_args()
+    os.makedirs(args.output, exist_ok=True)
+    
+    if not args.skip_embedding:
+        build_embedding_artifact(args.output)
+    if args.onnx:
+        build_embedding_onnx_artifact(args.output, args.onnx_optimization, args.onnx_quantization)
+    if not args.skip_summary:
+        build_summary_artifact(args.output)
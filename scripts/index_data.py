@@ -7,10 +7,17 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.db.elasticsearch import es_client
-from app.db.index import create_index, delete_index
+from app.db.index import create_index, delete_index, genre_terms, suggest_inputs, mark_indexed
 from app.services.vector import create_semantic_text, get_embedding
+from app.services.similar import compute_similar_movies
 from app.core.config import settings
 
+def index_similar_movies():
+    """Store the precomputed nearest neighbours of every movie"""
+    start = time.time()
+    updated = compute_similar_movies()
+    print(f"Stored top-{settings.SIMILAR_TOP_K} similar movies for {updated} documents in {time.time() - start:.1f}s")
+
 def index_data(csv_path: str, recreate_index: bool = False):
     """Index data from CSV into Elasticsearch"""
     
@@ -45,6 +52,12 @@ def index_data(csv_path: str, recreate_index: bool = False):
             # Add the embedding vector
             movie_doc["embedding"] = vector
             
+            # Individual genres as keywords for the facet aggregations
+            movie_doc["genre_list"] = genre_terms(movie_doc.get("genres"))
+            
+            # Title and people entries for the typeahead
+            movie_doc.update(suggest_inputs(movie_doc))
+            
             # Handle numeric field conversion
             for field in ["vote_average", "vote_count", "revenue", "runtime", "budget", 
                         "popularity", "imdb_rating", "imdb_votes", "year", "profit", "roi"]:
@@ -68,6 +81,12 @@ def index_data(csv_path: str, recreate_index: bool = False):
             print(f"Error indexing document {doc.get('id', i)}: {e}")
     
     print(f"Successfully indexed {indexed_count}/{len(documents)} documents")
+    
+    # Neighbour lists depend on the whole catalog, so recompute them after every run
+    index_similar_movies()
+    
+    # Invalidate the cached global facets of running servers
+    mark_indexed()
     return True
 
 if __name__ == "__main__":
@@ -76,7 +95,11 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Index movie data into Elasticsearch")
     parser.add_argument("--csv", default="app/data/testSample.csv", help="Path to CSV file")
     parser.add_argument("--recreate", action="store_true", help="Recreate the index (delete existing)")
+    parser.add_argument("--similar-only", action="store_true", help="Only recompute the similar movies of the indexed documents")
     
     args = parser.parse_args()
     
-    index_data(args.csv, args.recreate)
\ No newline at end of file
+    if args.similar_only:
+        index_similar_movies()
+    else:
+        index_data(args.csv, args.recreate)
\ No newline at end of file
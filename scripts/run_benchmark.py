@@ -0,0 +1,80 @@
+import os
+import sys
+import logging
+
+# Add the project root to the path
+script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(script_dir, '..'))
+sys.path.insert(0, project_root)
+
+from app.evaluation.benchmark import run_benchmark_suite
+from app.evaluation.queries import llm_evaluation_queries, llm_weight_optimization_queries
+
+logging.basicConfig(level=logging.INFO)
+
+def print_results(results):
+    """Print a latency/throughput table for the benchmark results"""
+    print("=" * 100)
+    print(f"SEARCH BENCHMARK - {results['num_queries']} queries x {results['repeat']}, concurrency {results['concurrency']}")
+    print("=" * 100)
+    print("Target".ljust(28) + "p50 ms".rjust(10) + "p95 ms".rjust(10) + "p99 ms".rjust(10) + "QPS".rjust(10) + "  Stages (mean ms)")
+    print("-" * 100)
+    
+    for target, r in results["targets"].items():
+        if "p50_ms" not in r:
+            print(f"{target.ljust(28)}  all {r['requests']} requests failed: {r.get('first_error', '')}")
+            continue
+        stages = ", ".join(f"{stage}={ms:.1f}" for stage, ms in sorted(r["stages_mean_ms"].items()))
+        print(
+            target.ljust(28)
+            + f"{r['p50_ms']:10.1f}{r['p95_ms']:10.1f}{r['p99_ms']:10.1f}{r['qps']:10.1f}  {stages}"
+        )
+        for key, parity in r.items():
+            if key.startswith("parity_vs_"):
+                status = "ok" if parity["passed"] else "BELOW THRESHOLD"
+                print(f"{'':28}  {key}: min cosine {parity['min_cosine']:.4f} ({status})")
+    
+    if results["baseline_mismatch"]:
+        print("\nBaseline not compared, its configuration differs (use --update-baseline to replace it):")
+        for key, diff in results["baseline_mismatch"].items():
+            print(f"  {key}: baseline {diff['baseline']}, this run {diff['current']}")
+    
+    if results["regressions"]:
+        print("\nREGRESSIONS:")
+        for regression in results["regressions"]:
+            print(f"  {regression['target']} {regression['metric']}: {regression['baseline']:.2f} -> {regression['current']:.2f}")
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Benchmark search latency and throughput")
+    parser.add_argument("--concurrency", type=int, default=1, help="Number of requests in flight")
+    parser.add_argument("--size", type=int, default=10, help="Number of results per search")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the query set")
+    parser.add_argument("--small", action="store_true", help="Use the smaller weight-optimization query set")
+    parser.add_argument("--http", default=None, help="Base URL of a running server to also benchmark the endpoints")
+    parser.add_argument("--embeddings", nargs="*", default=None, help="Compare query encoding across backends, e.g. torch onnx")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change flagged as a regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    
+    args = parser.parse_args()
+    
+    results = run_benchmark_suite(
+        llm_weight_optimization_queries if args.small else llm_evaluation_queries,
+        concurrency=args.concurrency,
+        size=args.size,
+        repeat=args.repeat,
+        base_url=args.http,
+        results_dir=os.path.join(project_root, 'evaluation_results'),
+        tolerance=args.tolerance,
+        update_baseline=args.update_baseline,
+        embedding_backends=args.embeddings
+    )
+    print_results(results)
+    
+    # Non-zero exit so CI can fail on regressions
+    if results["regressions"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
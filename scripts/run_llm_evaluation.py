@@ -9,7 +9,7 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(script_dir, '..'))
 sys.path.insert(0, project_root)
 
-from app.evaluation.metrics import compare_search_methods, find_optimal_weights
+from app.evaluation.metrics import compare_search_methods, find_optimal_weights, warmup_evaluator
 from app.evaluation.queries import llm_evaluation_queries, llm_weight_optimization_queries
 
 def create_evaluation_summary(comparison_results, weight_results=None):
@@ -49,6 +49,28 @@ def create_evaluation_summary(comparison_results, weight_results=None):
             line += f" | {value:.4f}".ljust(25)
         summary.append(line)
     
+    # Add confidence intervals and significance tests if available
+    significance = comparison_results.get("significance")
+    if significance:
+        confidence = int(significance["confidence"] * 100)
+        summary.append(f"\nMETRICS WITH {confidence}% BOOTSTRAP CONFIDENCE INTERVALS:")
+        summary.append("-" * 40)
+        for method, method_metrics in significance["methods"].items():
+            summary.append(f"\n{method.capitalize()}:")
+            for name, label in [("precision", "P@k"), ("ndcg", "NDCG"), ("mrr", "MRR"), ("recall", "Recall"), ("ap", "MAP")]:
+                m = method_metrics[name]
+                summary.append(f"  {label}: {m['mean']:.4f} [{m['ci_low']:.4f}, {m['ci_high']:.4f}]")
+        
+        summary.append("\nPAIRED SIGNIFICANCE TESTS (p-values, bootstrap / permutation):")
+        summary.append("-" * 40)
+        for pair, tests in significance["comparisons"].items():
+            for name in ["precision", "ndcg"]:
+                test = tests[name]
+                summary.append(
+                    f"  {pair.replace('_vs_', ' vs ')} {name}: diff {test['bootstrap']['mean_difference']:+.4f}, "
+                    f"p = {test['bootstrap']['p_value']:.4f} / {test['permutation']['p_value']:.4f}"
+                )
+    
     # Add best/worst query for each method
     summary.append("\nBEST/WORST QUERIES BY METHOD:")
     summary.append("-" * 40)
@@ -86,6 +108,10 @@ def main():
     results_dir = os.path.join(project_root, 'evaluation_results')
     os.makedirs(results_dir, exist_ok=True)
     
+    # Load the judge model up front so it is not counted in the timings
+    print("Loading evaluator model...")
+    warmup_evaluator()
+    
     # Run method comparison first with a subset of queries
     query_subset = llm_evaluation_queries[:10]  # Start with 10 queries for quick testing
     
@@ -114,7 +140,7 @@ def main():
         start_time = time.time()
         weight_results = find_optimal_weights(
             llm_weight_optimization_queries, 
-            weight_steps=5,
+            weight_steps=20,
             top_k=5,
             results_dir=results_dir
         )